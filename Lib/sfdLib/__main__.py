@@ -1,4 +1,6 @@
 import argparse
+import sys
+import time
 
 from ufoLib2 import Font
 from .parser import SFDParser
@@ -8,8 +10,18 @@ def main():
     parser = argparse.ArgumentParser(
         prog="sfd2ufo", description="Convert FontForge fonts to UFO."
     )
-    parser.add_argument("sfdfile", metavar="FILE", help="input font to process")
-    parser.add_argument("ufofile", metavar="FILE", help="output font to write")
+    parser.add_argument(
+        "sfdfile", metavar="FILE", nargs="?", help="input font to process"
+    )
+    parser.add_argument(
+        "ufofile", metavar="FILE", nargs="?", help="output font to write"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="convert the input and output font pairs listed in FILE, one pair "
+        "per line, with --jobs fonts converted at a time",
+    )
     parser.add_argument(
         "--ufo-anchors",
         action="store_true",
@@ -23,9 +35,135 @@ def main():
     parser.add_argument(
         "--minimal", action="store_true", help="output enough UFO to build the font"
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes to parse glyphs with, or to convert fonts with "
+        "when using --batch (default: 1)",
+    )
+    parser.add_argument(
+        "--save-jobs",
+        type=int,
+        default=1,
+        help="number of processes to serialize glyphs with when saving the UFO "
+        "(default: 1)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="keep glyph outlines in compact arrays until the UFO is written, "
+        "using less memory for large fonts",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write each glyph as soon as it is parsed, so that memory use does "
+        "not grow with the number of glyphs",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only reparse glyphs that changed since the last conversion",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="time each conversion phase and print a report, as a table or JSON "
+        "(default: text)",
+    )
+    parser.add_argument(
+        "--memory-report",
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="like --profile, but also trace memory use of each phase and of the "
+        "main parser structures; much slower (default: text)",
+    )
+    parser.add_argument(
+        "--cprofile",
+        nargs=2,
+        metavar=("PHASE", "FILE"),
+        help="run the PHASE conversion phase under cProfile and dump its stats "
+        "to FILE",
+    )
 
     args = parser.parse_args()
 
+    if args.batch:
+        if args.sfdfile is not None:
+            parser.error("input and output fonts can’t be used with --batch")
+        if args.profile or args.memory_report or args.cprofile:
+            parser.error("profiling options can’t be used with --batch")
+        if args.stream or args.compact or args.save_jobs > 1:
+            parser.error(
+                "--stream, --compact and --save-jobs can’t be used with --batch"
+            )
+        return batch(args)
+    if args.ufofile is None:
+        parser.error("input and output fonts are required")
+    profiling = args.profile or args.memory_report or args.cprofile
+    if args.cprofile:
+        from .profiler import PHASES
+
+        if args.cprofile[0] not in PHASES:
+            parser.error(
+                f"unknown phase {args.cprofile[0]!r}, expected one of "
+                + ", ".join(PHASES)
+            )
+    if profiling and args.incremental:
+        parser.error("profiling options can’t be used with --incremental")
+    if args.stream and (args.incremental or args.compact):
+        parser.error("--stream can’t be used with --incremental or --compact")
+    if args.save_jobs > 1 and (args.stream or args.incremental):
+        parser.error("--save-jobs can’t be used with --stream or --incremental")
+    if args.jobs > 1 and args.incremental:
+        parser.error("--jobs can’t be used with --incremental")
+
+    if args.incremental:
+        from .incremental import convert
+
+        convert(
+            args.sfdfile,
+            args.ufofile,
+            args.ufo_anchors,
+            args.ufo_kerning,
+            args.minimal,
+        )
+        return
+
+    profiler = None
+    output = args.profile
+    if args.memory_report:
+        from .memory import MemoryProfiler
+
+        profiler = MemoryProfiler(args.cprofile)
+        output = args.memory_report
+    elif profiling:
+        from .profiler import Profiler
+
+        profiler = Profiler(args.cprofile)
+
+    if args.stream:
+        from .stream import convert
+
+        parser = convert(
+            args.sfdfile,
+            args.ufofile,
+            args.ufo_anchors,
+            args.ufo_kerning,
+            args.minimal,
+            args.jobs,
+            profiler,
+        )
+        if args.memory_report:
+            profiler.measure(parser)
+        report(profiler, output)
+        return
+
     font = Font()
     parser = SFDParser(
         args.sfdfile,
@@ -33,11 +171,65 @@ def main():
         args.ufo_anchors,
         args.ufo_kerning,
         args.minimal,
+        args.jobs,
+        args.compact,
+        profiler,
     )
     parser.parse()
 
-    font.save(args.ufofile, overwrite=True, validate=False)
+    if profiler is None:
+        save(font, args)
+        return
+
+    if args.memory_report:
+        profiler.measure(parser)
+
+    glyphCount = lambda: sum(len(layer) for layer in font.layers)
+    with profiler.phase("save", glyphCount):
+        save(font, args)
+
+    report(profiler, output)
+
+
+def save(font, args):
+    if args.save_jobs > 1:
+        from .save import saveFont
+
+        saveFont(font, args.ufofile, args.save_jobs)
+    else:
+        font.save(args.ufofile, overwrite=True, validate=False)
+
+
+def report(profiler, output):
+    if output == "json":
+        print(profiler.toJSON())
+    elif output:
+        print(profiler.report())
+
+
+def batch(args):
+    from .batch import convertMany, readBatch
+
+    pairs = readBatch(args.batch)
+    start = time.perf_counter()
+    failed = 0
+    for sfdfile, ufofile, seconds, error in convertMany(
+        pairs,
+        args.ufo_anchors,
+        args.ufo_kerning,
+        args.minimal,
+        args.jobs,
+        args.incremental,
+    ):
+        if error is None:
+            print(f"{sfdfile} -> {ufofile}: {seconds:.2f}s")
+        else:
+            failed += 1
+            print(f"{sfdfile} -> {ufofile}: failed: {error!r}", file=sys.stderr)
+    seconds = time.perf_counter() - start
+    print(f"{len(pairs) - failed} of {len(pairs)} fonts converted in {seconds:.2f}s")
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ufoLib2 import Font
+
+from .parser import SFDParser
+
+
+def readBatch(path):
+    """Read the input and output font pairs of a batch file.
+
+    Each non-empty line holds an input SFD file or SFDIR directory and the UFO
+    to write, separated by white space; lines starting with # are ignored.
+    Relative paths are relative to the batch file.
+    """
+    root = os.path.dirname(os.path.abspath(path))
+    pairs = []
+    with open(path) as fd:
+        for n, line in enumerate(fd, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split()
+            if len(fields) != 2:
+                raise Exception(f"{path}:{n}: expected an input and an output font")
+            pairs.append(tuple(os.path.join(root, f) for f in fields))
+    return pairs
+
+
+def convert(sfdfile, ufofile, ufo_anchors=False, ufo_kerning=False, minimal=False):
+    """Convert one font, returning the wall time it took in seconds."""
+    start = time.perf_counter()
+    font = Font()
+    parser = SFDParser(sfdfile, font, ufo_anchors, ufo_kerning, minimal)
+    parser.parse()
+    font.save(ufofile, overwrite=True, validate=False)
+    return time.perf_counter() - start
+
+
+def _convertIncremental(sfdfile, ufofile, *options):
+    from .incremental import convert
+
+    start = time.perf_counter()
+    convert(sfdfile, ufofile, *options)
+    return time.perf_counter() - start
+
+
+def convertMany(
+    pairs,
+    ufo_anchors=False,
+    ufo_kerning=False,
+    minimal=False,
+    jobs=1,
+    incremental=False,
+):
+    """Convert many fonts, jobs of them at a time.
+
+    The worker processes are started once and reused for all the fonts, so the
+    cost of starting Python and importing the libraries is only paid once per
+    worker. Yields (sfdfile, ufofile, seconds, error) tuples as the fonts are
+    done, where error is the exception the conversion failed with, or None.
+    seconds is the time the conversion took in its worker, and None when it
+    failed.
+    """
+    options = (ufo_anchors, ufo_kerning, minimal)
+    func = _convertIncremental if incremental else convert
+
+    if jobs <= 1:
+        for sfdfile, ufofile in pairs:
+            try:
+                yield sfdfile, ufofile, func(sfdfile, ufofile, *options), None
+            except Exception as e:
+                yield sfdfile, ufofile, None, e
+        return
+
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = {}
+        for sfdfile, ufofile in pairs:
+            future = executor.submit(func, sfdfile, ufofile, *options)
+            futures[future] = (sfdfile, ufofile)
+        for future in as_completed(futures):
+            sfdfile, ufofile = futures[future]
+            try:
+                yield sfdfile, ufofile, future.result(), None
+            except Exception as e:
+                yield sfdfile, ufofile, None, e
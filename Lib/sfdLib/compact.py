@@ -0,0 +1,84 @@
+from fontTools.pens.boundsPen import ControlBoundsPen
+from fontTools.pens.pointPen import PointToSegmentPen
+
+# Not public API, this module is only imported by compact parsing.
+from ufoLib2.objects.layer import _GLYPH_NOT_LOADED
+from ufoLib2.objects.misc import BoundingBox
+
+
+class _Drawing:
+    __slots__ = ("glyph", "outline")
+
+    def __init__(self, glyph, outline):
+        self.glyph = glyph
+        self.outline = outline
+
+    def draw(self, pen):
+        if self.outline is not None:
+            self.outline.drawPoints(PointToSegmentPen(pen))
+        self.glyph.draw(pen)
+
+
+class OutlineStore:
+    """Outlines of the glyphs of one layer.
+
+    While parsing, glyphs stay in the layer without their contours, which are
+    added here instead. Once the font is complete, compact() takes the glyphs
+    out of the layer too, and ufoLib2 loads them back, outlines converted to
+    ufoLib2 objects, only when they are accessed or the font is saved.
+
+    This only saves memory until then: saving the font builds every glyph as
+    ufoLib2 objects all the same. It hooks into the lazy loading of ufoLib2
+    layers, which is not public API, and needs ufoLib2 0.14 or later.
+    """
+
+    def __init__(self, layer):
+        self._layer = layer
+        self._glyphs = {}
+        self.outlines = {}
+
+    def add(self, name, outline):
+        if name in self.outlines:
+            self.outlines[name].extend(outline)
+        else:
+            self.outlines[name] = outline
+
+    def _glyph(self, name):
+        if name in self._glyphs:
+            return self._glyphs[name]
+        return self._layer[name]
+
+    def __getitem__(self, name):
+        # Glyph set interface for pens drawing components.
+        return _Drawing(self._glyph(name), self.outlines.get(name))
+
+    def controlBounds(self, name):
+        """Return the control bounds of a glyph, without loading it."""
+        glyph = self._glyph(name)
+        outline = self.outlines.get(name)
+        if outline is not None and not glyph.components:
+            return outline.controlBounds()
+        pen = ControlBoundsPen(self)
+        pen.skipMissingComponents = False
+        self[name].draw(pen)
+        return None if pen.bounds is None else BoundingBox(*pen.bounds)
+
+    def compact(self):
+        layer = self._layer
+        for name in self.outlines:
+            glyph = layer._glyphs[name]
+            if glyph is not _GLYPH_NOT_LOADED:
+                self._glyphs[name] = glyph
+                layer._glyphs[name] = _GLYPH_NOT_LOADED
+        if self._glyphs:
+            layer._glyphSet = self
+            layer._lazy = True
+
+    def readGlyph(self, name, glyph, pointPen=None):
+        # Called by ufoLib2 to load a glyph we took out of the layer.
+        shell = self._glyphs.pop(name)
+        outline = self.outlines.pop(name)
+        for field in shell.__slots__:
+            if field not in ("_name", "__weakref__"):
+                setattr(glyph, field, getattr(shell, field))
+        glyph.contours.extend(outline.contours())
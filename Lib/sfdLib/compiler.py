@@ -0,0 +1,190 @@
+import argparse
+import contextlib
+import logging
+
+from ufoLib2 import Font
+
+from .layout import LayoutSFDParser
+from .parser import SFDParser
+from .profiler import Profiler
+
+
+class _StageTimes(logging.Handler):
+    """Collects the stage times ufo2ft logs with fontTools’ Timer."""
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.stages = []
+
+    def emit(self, record):
+        # Timer passes its message and elapsed time as the record args.
+        args = record.args
+        if isinstance(args, dict) and "msg" in args and "time" in args:
+            self.stages.append(dict(name=args["msg"], seconds=args["time"]))
+
+
+@contextlib.contextmanager
+def _stageTimes():
+    logger = logging.getLogger("ufo2ft.timer")
+    handler = _StageTimes()
+    level, propagate = logger.level, logger.propagate
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    # Keep the timings out of whatever logging is configured.
+    logger.propagate = False
+    try:
+        yield handler.stages
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = propagate
+
+
+def _layoutCompilerClass(layout):
+    """Return a ufo2ft feature compiler class building the tables of layout."""
+    from ufo2ft.featureCompiler import BaseFeatureCompiler
+
+    class LayoutCompiler(BaseFeatureCompiler):
+        def setupFeatures(self):
+            pass
+
+        def buildTables(self):
+            layout.buildTables(self.ttFont)
+
+    return LayoutCompiler
+
+
+def compileFont(font, format="otf", maxError=None, profiler=None, layout=None):
+    """Compile a font parsed by SFDParser to an OTF or TTF TTFont, with ufo2ft.
+
+    The font is compiled in place, it is not usable afterwards. For TTF, cubic
+    outlines are converted to quadratic ones with a maximum error of maxError
+    em, ufo2ft’s default if None. With a profiler, compiling is timed as the
+    "compile" phase, with the times of the ufo2ft stages as its "stages".
+
+    If layout is the LayoutSFDParser that parsed the font, its GSUB, GPOS and
+    GDEF tables are built directly instead of compiling features.
+    """
+    import ufo2ft
+
+    options = {}
+    if layout is not None:
+        options["featureCompilerClass"] = _layoutCompilerClass(layout)
+
+    if format == "otf":
+        build = lambda: ufo2ft.compileOTF(font, inplace=True, **options)
+    elif format == "ttf":
+        build = lambda: ufo2ft.compileTTF(
+            font, inplace=True, cubicConversionError=maxError, **options
+        )
+    else:
+        raise Exception(f"Unsupported format: {format}")
+
+    if profiler is None:
+        return build()
+    with profiler.phase("compile", lambda: len(font)) as phase:
+        with _stageTimes() as stages:
+            ttFont = build()
+        phase["stages"] = stages
+    return ttFont
+
+
+def main(format):
+    parser = argparse.ArgumentParser(
+        prog=f"sfd2{format}",
+        description=f"Compile FontForge fonts to {format.upper()}, without "
+        "writing a UFO.",
+    )
+    parser.add_argument("sfdfile", metavar="FILE", help="input font to process")
+    parser.add_argument("output", metavar="FILE", help="output font to write")
+    parser.add_argument(
+        "--ufo-anchors",
+        action="store_true",
+        help="leave mark positioning to ufo2ft feature writers",
+    )
+    parser.add_argument(
+        "--ufo-kerning",
+        action="store_true",
+        help="leave kerning to ufo2ft feature writers",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of processes to parse glyphs with (default: 1)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="keep glyph outlines in compact arrays until they are compiled",
+    )
+    if format == "ttf":
+        parser.add_argument(
+            "--max-error",
+            type=float,
+            help="maximum error of the conversion of cubic outlines to quadratic, "
+            "in em (default: ufo2ft’s)",
+        )
+    parser.add_argument(
+        "--otl",
+        action="store_true",
+        help="build GSUB, GPOS and GDEF with fontTools.otlLib directly, instead of "
+        "compiling a feature file",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="time parsing and each compile stage and print a report, as a table "
+        "or JSON (default: text)",
+    )
+
+    args = parser.parse_args()
+    if args.otl and (args.ufo_anchors or args.ufo_kerning):
+        parser.error("--otl can’t be used with --ufo-anchors or --ufo-kerning")
+
+    try:
+        import ufo2ft
+    except ImportError:
+        parser.error("ufo2ft is needed to compile fonts, install sfdLib[compile]")
+
+    profiler = Profiler()
+    font = Font()
+    # Only what is needed to build the font is parsed.
+    parserClass = LayoutSFDParser if args.otl else SFDParser
+    sfd = parserClass(
+        args.sfdfile,
+        font,
+        args.ufo_anchors,
+        args.ufo_kerning,
+        True,
+        args.jobs,
+        args.compact,
+        profiler,
+    )
+    sfd.parse()
+
+    ttFont = compileFont(
+        font,
+        format,
+        getattr(args, "max_error", None),
+        profiler,
+        sfd if args.otl else None,
+    )
+    with profiler.phase("save"):
+        ttFont.save(args.output)
+
+    if args.profile == "json":
+        print(profiler.toJSON())
+    elif args.profile:
+        print(profiler.report())
+
+
+def sfd2otf():
+    return main("otf")
+
+
+def sfd2ttf():
+    return main("ttf")
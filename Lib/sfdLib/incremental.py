@@ -0,0 +1,439 @@
+import functools
+import hashlib
+import io
+import json
+import os
+import pathlib
+
+from ufoLib2 import Font
+from ufoLib2.objects import Features, Info
+from ufoLib2.objects.misc import BoundingBox, unionBounds
+
+from .index import SFDIndex
+from .parser import (
+    CATEGORIES_KEY,
+    ENCODING_RE,
+    STARTCHAR_RE,
+    GlyphOrder,
+    SFDParser,
+    SFDReadUTF7,
+    _tokenize,
+)
+
+MANIFEST_VERSION = 2
+
+# Header records that derived font data is made from, by section. The rest of
+# the header is parsed again every time.
+_SECTIONS = {
+    "Lookup": "lookups",
+    "ContextPos2": "lookups",
+    "ContextSub2": "lookups",
+    "ChainPos2": "lookups",
+    "ChainSub2": "lookups",
+    "ReverseChain2": "lookups",
+    "MarkAttachClasses": "lookups",
+    "MarkAttachSets": "lookups",
+    "KernClass2": "KernClass2",
+    "AnchorClass2": "AnchorClass2",
+}
+
+# Header sections that derived font data is made from, besides the glyphs.
+_DERIVED = {
+    "features": ("lookups", "KernClass2", "AnchorClass2"),
+    "kerning": ("lookups", "KernClass2"),
+}
+
+
+def manifestPath(ufo):
+    """Return the path of the manifest kept next to the given UFO."""
+    return os.path.normpath(ufo) + ".sfdlib.json"
+
+
+def _hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def _readText(filename):
+    with open(filename) as fp:
+        return io.StringIO(fp.read())
+
+
+class _Rebuild(Exception):
+    """The previous conversion can’t be reused."""
+
+
+class IncrementalSFDParser(SFDParser):
+    """Parses an SFD file or SFDIR directory reusing a previous conversion.
+
+    font is the UFO written by the previous run, opened lazily, and manifest
+    what that run recorded about every glyph record: its content hash and its
+    contributions to the font wide tables (kerning, anchors, substitutions,
+    categories and so on). Records with unchanged hashes are not parsed again,
+    their table entries are restored from the manifest and their glyphs are
+    left untouched in the font. Glyphs that reference other glyphs by GID are
+    parsed again when the Encoding order changed under them.
+
+    Features, and kerning and groups, are kept from the previous run too when
+    neither the header sections nor the glyph table entries they are made from
+    changed, the unchanged attribute says which.
+
+    Without a manifest everything is parsed, as SFDParser would do, and the
+    manifest for the next run is recorded.
+    """
+
+    def __init__(
+        self,
+        path,
+        font,
+        manifest=None,
+        ufo_anchors=False,
+        ufo_kerning=False,
+        minimal=False,
+    ):
+        super().__init__(path, font, ufo_anchors, ufo_kerning, minimal)
+        self._manifest = manifest
+        self._previous = {}
+        self._bounds = {}
+        if manifest is not None:
+            self._previous = {g["hash"]: g for g in manifest["glyphs"]}
+            self._bounds = manifest["bounds"]
+
+        self._glyphs = []
+        self._captured = None
+        self._renameCursive = False
+
+        self.sections = {}
+        self.derived = {}
+        self.parsed = set()
+        self.unchanged = set()
+
+    def _hashSections(self, lines):
+        hashes = {}
+        for key, value, section in _tokenize(lines, self._HEADER_SECTIONS):
+            if key not in _SECTIONS:
+                continue
+            h = hashes.setdefault(_SECTIONS[key], hashlib.sha1())
+            h.update(f"{key}: {value}\n".encode())
+            if section is not None:
+                for line in section:
+                    h.update(line.encode())
+        self.sections = {k: h.hexdigest() for k, h in sorted(hashes.items())}
+
+    def _hashDerived(self):
+        # Everything recorded about the glyphs but their content hashes, so
+        # that outline changes alone don't count.
+        glyphs = [{k: v for k, v in g.items() if k != "hash"} for g in self._glyphs]
+        glyphs = json.dumps(glyphs, sort_keys=True).encode()
+        derived = {}
+        for name, sections in _DERIVED.items():
+            h = hashlib.sha1(glyphs)
+            for section in sections:
+                h.update(f"{section}: {self.sections.get(section)}\n".encode())
+            derived[name] = h.hexdigest()
+        return derived
+
+    def _layerSpec(self):
+        return [[getattr(l, "name", l) for l in self._layers], self._layerType]
+
+    def _newLayer(self, name):
+        if name in self._font.layers:
+            return self._font.layers[name]
+        return super()._newLayer(name)
+
+    def _newLayers(self):
+        super()._newLayers()
+        if self._manifest is not None and self._manifest["layers"] != self._layerSpec():
+            raise _Rebuild("layers changed")
+
+    def _indexRecords(self, index):
+        for idx in range(len(index)):
+            yield (
+                _hash(index.record(idx)),
+                index.names[idx],
+                index.orders[idx],
+                functools.partial(index.recordLines, idx),
+            )
+
+    def _dirRecords(self):
+        for filename in pathlib.Path(self._path).glob("*.glyph"):
+            with open(filename, "rb") as fp:
+                data = fp.read()
+            h = _hash(data)
+            if h in self._previous:
+                name = self._previous[h]["name"]
+                order = self._previous[h]["order"]
+            else:
+                text = data.decode("utf-8")
+                name = STARTCHAR_RE.search(text).group(1)
+                if name.startswith('"'):
+                    name = SFDReadUTF7(name)
+                order = int(ENCODING_RE.search(text).group(1))
+            yield h, name, order, functools.partial(_readText, filename)
+
+    def parse(self):
+        if os.path.isdir(self._path):
+            props = os.path.join(self._path, "font.props")
+            if not os.path.isfile(props):
+                raise Exception("Not an SFD directory")
+            with open(props) as fd:
+                self._hashSections(fd)
+            with open(props) as fd:
+                offsetMetrics = self._parseHeader(fd)
+            self._newLayers()
+            self._parseRecords(self._dirRecords())
+        else:
+            with SFDIndex(self._path) as index:
+                self._hashSections(index.headerLines())
+                offsetMetrics = self._parseHeader(index.headerLines())
+                self._newLayers()
+                self._parseRecords(self._indexRecords(index))
+
+        self._finish(offsetMetrics)
+
+    def _parseRecords(self, records):
+        font = self._font
+        records = list(records)
+
+        # Names and orders of all glyphs are known before parsing any, so
+        # references of unchanged glyphs can be checked against the new order.
+        orders = {name: order for _, name, order, _ in records}
+        glyphOrder = GlyphOrder(orders)
+
+        dirty = set()
+        for h, name, _, _ in records:
+            previous = self._previous.get(h)
+            if previous is None:
+                dirty.add(name)
+                continue
+            for gid, base in previous["refs"]:
+                if gid >= len(glyphOrder) or glyphOrder[gid] != base:
+                    dirty.add(name)
+                    break
+
+        for layer in font.layers:
+            for name in list(layer.keys()):
+                if name in dirty or name not in orders:
+                    del layer[name]
+
+        self._glyphOrder = glyphOrder
+        font.lib[CATEGORIES_KEY] = {}
+        unicodes = {}
+        for h, name, order, lines in records:
+            if name in dirty:
+                glyph = self._capture(h, name, order, lines)
+                self.parsed.add(name)
+            else:
+                glyph = self._previous[h]
+                self._restore(glyph)
+            unicodes[name] = glyph["unicode"]
+            self._glyphs.append(glyph)
+
+        font.glyphOrder = glyphOrder.sort(unicodes)
+
+    def _finish(self, offsetMetrics):
+        self.derived = self._hashDerived()
+        if self._manifest is not None:
+            previous = self._manifest["derived"]
+            self.unchanged = {k for k, v in self.derived.items() if previous[k] == v}
+
+        font = self._font
+        if "features" not in self.unchanged:
+            font.features = Features()
+        if "kerning" not in self.unchanged:
+            font.groups.clear()
+            font.kerning.clear()
+        super()._finish(offsetMetrics)
+
+    def _capture(self, h, name, order, lines):
+        font = self._font
+        self._captured = captured = {"hash": h, "name": name, "order": order}
+        self._parseGlyphs([lines()])
+        self._captured = None
+
+        glyph = font.layers.defaultLayer[name]
+        refs = []
+        for layerIdx in range(len(self._layers)):
+            for ref in self._glyphRefs.get((name, layerIdx), []):
+                gid = int(ref.split()[0])
+                refs.append([gid, self._glyphOrder[gid]])
+        cursive = set()
+        for anchor in glyph.anchors:
+            if anchor.name.startswith(("exit.", "entry.")):
+                cursive.add(anchor.name.split(".", 1)[1])
+
+        captured.update(
+            unicode=glyph.unicode,
+            category=font.lib[CATEGORIES_KEY].get(name),
+            anchors=self._glyphAnchors.get(name),
+            possub=self._glyphPosSub.get(name),
+            carets=self._ligatureCarets.get(name),
+            refs=refs,
+            cursive=sorted(cursive),
+        )
+        return captured
+
+    def _restore(self, glyph):
+        name = glyph["name"]
+        for value in glyph.get("kerns", []):
+            SFDParser._parseKerns(self, name, value)
+        for altuni in glyph.get("altuni", []):
+            SFDParser._parseAltuni(self, name, altuni)
+        if glyph["category"] is not None:
+            self._font.lib[CATEGORIES_KEY][name] = glyph["category"]
+        if glyph["anchors"] is not None:
+            self._addGlyphAnchors(name, glyph["anchors"])
+        if glyph["possub"] is not None:
+            self._addGlyphPosSub(name, glyph["possub"])
+        if glyph["carets"] is not None:
+            self._ligatureCarets[name] = glyph["carets"]
+
+    def _parseKerns(self, name, data):
+        if self._captured is not None:
+            self._captured.setdefault("kerns", []).append(data)
+        super()._parseKerns(name, data)
+
+    def _parseAltuni(self, name, altuni):
+        if self._captured is not None:
+            self._captured.setdefault("altuni", []).append(altuni)
+        return super()._parseAltuni(name, altuni)
+
+    def _processUFOKerning(self):
+        if "kerning" not in self.unchanged:
+            super()._processUFOKerning()
+
+    def _writeGSUBGPOS(self, isgpos=False):
+        if "features" not in self.unchanged:
+            super()._writeGSUBGPOS(isgpos)
+
+    def _writeGDEF(self):
+        if "features" not in self.unchanged:
+            super()._writeGDEF()
+        else:
+            # Guessed categories still go to the font lib.
+            self._glyphCategories()
+
+    def _fixUFOAnchors(self):
+        if not self._use_ufo_anchors:
+            return
+
+        anchors = set()
+        for glyph in self._glyphs:
+            anchors.update(glyph["cursive"])
+        self._renameCursive = len(anchors) == 1
+
+        # Unchanged glyphs were written with the previous decision.
+        if self._manifest is not None:
+            if self._manifest["renameCursive"] != self._renameCursive:
+                raise _Rebuild("cursive anchors changed")
+
+        if self._renameCursive:
+            layer = self._layers[1]
+            for name in self.parsed:
+                for anchor in layer[name].anchors:
+                    if anchor.name.startswith(("exit.", "entry.")):
+                        anchor.name = anchor.name.split(".")[0]
+
+    def _staleBounds(self):
+        # Bounds include components, so glyphs using changed glyphs are
+        # measured again too.
+        users = {}
+        for glyph in self._glyphs:
+            for _, base in glyph["refs"]:
+                users.setdefault(base, []).append(glyph["name"])
+        stale = set(self.parsed)
+        pending = list(self.parsed)
+        while pending:
+            for name in users.get(pending.pop(), []):
+                if name not in stale:
+                    stale.add(name)
+                    pending.append(name)
+        return stale
+
+    def _fontBounds(self):
+        layer = self._font.layers.defaultLayer
+        stale = self._staleBounds()
+        bounds = None
+        for name in layer.keys():
+            if name in stale or name not in self._bounds:
+                glyphBounds = layer[name].getControlBounds(layer)
+                self._bounds[name] = glyphBounds and list(glyphBounds)
+            if self._bounds[name] is not None:
+                bounds = unionBounds(bounds, BoundingBox(*self._bounds[name]))
+        self._bounds = {k: self._bounds[k] for k in layer.keys()}
+        self.parsed = self.parsed | stale
+        return bounds
+
+    def manifest(self, options):
+        """Return the manifest to store for the next run."""
+        stale = self._staleBounds()
+        bounds = {}
+        for name, glyphBounds in self._bounds.items():
+            if name not in stale and name in self._font:
+                bounds[name] = glyphBounds
+        return {
+            "version": MANIFEST_VERSION,
+            "options": list(options),
+            "layers": self._layerSpec(),
+            "sections": self.sections,
+            "derived": self.derived,
+            "renameCursive": self._renameCursive,
+            "glyphs": self._glyphs,
+            "bounds": bounds,
+        }
+
+
+def _readManifest(path, options):
+    try:
+        with open(path) as fp:
+            manifest = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    if manifest.get("options") != list(options):
+        return None
+    return manifest
+
+
+def convert(sfdfile, ufofile, ufo_anchors=False, ufo_kerning=False, minimal=False):
+    """Convert sfdfile to ufofile, redoing only what changed since last time.
+
+    Returns the parser, whose parsed attribute holds the names of the glyphs
+    that were parsed again.
+    """
+    options = (ufo_anchors, ufo_kerning, minimal)
+    path = manifestPath(ufofile)
+
+    manifest = None
+    if os.path.isdir(ufofile):
+        manifest = _readManifest(path, options)
+    # A conversion that fails half way must not leave a manifest behind that
+    # no longer matches the UFO.
+    if os.path.exists(path):
+        os.remove(path)
+
+    parser = None
+    if manifest is not None:
+        font = Font.open(ufofile, lazy=True, validate=False)
+        # Info and lib are derived again from scratch, features, groups and
+        # kerning when the parser finds their inputs changed.
+        font.info = Info()
+        font.lib.clear()
+        parser = IncrementalSFDParser(sfdfile, font, manifest, *options)
+        try:
+            parser.parse()
+        except _Rebuild:
+            parser = None
+        else:
+            font.save(validate=False)
+
+    if parser is None:
+        font = Font()
+        parser = IncrementalSFDParser(sfdfile, font, None, *options)
+        parser.parse()
+        font.save(ufofile, overwrite=True, validate=False)
+
+    with open(path, "w") as fp:
+        fp.write(json.dumps(parser.manifest(options)))
+
+    return parser
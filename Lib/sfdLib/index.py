@@ -0,0 +1,165 @@
+import io
+import mmap
+import os
+
+from .parser import SFDReadUTF7
+
+
+def _lines(data):
+    """Decode bytes into lines the way reading the file in text mode would."""
+    return io.StringIO(str(data, "utf-8"), newline=None)
+
+
+class SFDIndex:
+    """Byte offsets of the glyph records of an SFD file.
+
+    The file is memory mapped and scanned once for StartChar…EndChar records,
+    noting where each one is together with its glyph name and Encoding order
+    (the FontForge GID). Records can then be looked up by name or GID without
+    parsing anything, and sliced as zero-copy memoryviews.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        with open(path, "rb") as fd:
+            # Empty files can't be mapped.
+            if not os.fstat(fd.fileno()).st_size:
+                raise Exception("Not an SFD file.")
+            self._mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        self.offsets = []
+        self.lengths = []
+        self.names = []
+        self.orders = []
+        self.unicodes = []
+
+        self._byName = {}
+        self._byGID = {}
+
+        self._scan()
+
+    def _lineEnd(self, pos):
+        end = self._mmap.find(b"\n", pos)
+        if end == -1:
+            return len(self._mmap)
+        return end + 1
+
+    def _scan(self):
+        data = self._mmap
+        size = len(data)
+
+        begin = data.find(b"\nBeginChars:")
+        if begin == -1:
+            # No glyphs, everything is header.
+            self._header = ((0, size),)
+            return
+
+        pos = self._lineEnd(begin + 1)
+        while True:
+            # pos is the start of a line, search from the newline before it so
+            # that a record with no blank line before it is not missed.
+            start = data.find(b"\nStartChar:", pos - 1)
+            if start == -1:
+                break
+            start += 1
+
+            end = start
+            while True:
+                end = data.find(b"\nEndChar", end)
+                if end == -1:
+                    raise Exception("Unterminated glyph record.")
+                end += 1
+                if data[end + 7 : end + 8] != b"s":
+                    break
+            end = self._lineEnd(end)
+
+            name = data[start + 10 : self._lineEnd(start)].decode().strip()
+            if name.startswith('"'):
+                name = SFDReadUTF7(name)
+
+            order = unicode = None
+            encoding = data.find(b"\nEncoding:", start, end)
+            if encoding != -1:
+                encoding += 10
+                value = data[encoding : self._lineEnd(encoding)].split()
+                unicode = int(value[1])
+                order = int(value[2])
+
+            idx = len(self.offsets)
+            self.offsets.append(start)
+            self.lengths.append(end - start)
+            self.names.append(name)
+            self.orders.append(order)
+            self.unicodes.append(unicode)
+            self._byName[name] = idx
+            if order is not None:
+                self._byGID[order] = idx
+
+            pos = end
+
+        chars = data.find(b"\nEndChars", pos - 1)
+        if chars == -1:
+            raise Exception("Unterminated BeginChars section.")
+        self._header = ((0, begin + 1), (self._lineEnd(chars + 1), size))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, name):
+        return name in self._byName
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+    def find(self, name):
+        """Return the record index of the glyph with the given name."""
+        return self._byName[name]
+
+    def findGID(self, gid):
+        """Return the record index of the glyph with the given FontForge GID."""
+        return self._byGID[gid]
+
+    def record(self, idx):
+        """Return the raw bytes of the record as a memoryview."""
+        offset = self.offsets[idx]
+        return self._view[offset : offset + self.lengths[idx]]
+
+    def recordValue(self, idx, key):
+        """Return the value of the first key line of the record, or None."""
+        return next(self.recordValues(idx, key), None)
+
+    def recordValues(self, idx, key):
+        """Yield the value of each key line of the record."""
+        pos = self.offsets[idx]
+        end = pos + self.lengths[idx]
+        key = b"\n" + key.encode() + b":"
+        while True:
+            pos = self._mmap.find(key, pos, end)
+            if pos == -1:
+                return
+            pos += len(key)
+            yield self._mmap[pos : self._lineEnd(pos)].decode().strip()
+
+    def recordLines(self, idx):
+        """Return an iterator over the text lines of the record."""
+        return _lines(self.record(idx))
+
+    def records(self, start=0, stop=None):
+        """Yield the text lines of each glyph record in file order."""
+        if stop is None:
+            stop = len(self)
+        for idx in range(start, stop):
+            yield self.recordLines(idx)
+
+    def headerLines(self):
+        """Yield the text lines of the file outside the BeginChars section."""
+        for start, end in self._header:
+            yield from _lines(self._view[start:end])
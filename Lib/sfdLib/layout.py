@@ -0,0 +1,335 @@
+from fontTools.misc.fixedTools import otRound
+from fontTools.otlLib import builder as otl
+from fontTools.ttLib import newTable
+from fontTools.ttLib.tables import otTables
+
+from .parser import CATEGORIES_KEY, SFDParser
+
+_LOOKUP_BUILDERS = {
+    "gsub_single": otl.SingleSubstBuilder,
+    "gsub_multiple": otl.MultipleSubstBuilder,
+    "gsub_alternate": otl.AlternateSubstBuilder,
+    "gsub_ligature": otl.LigatureSubstBuilder,
+    "gsub_context": otl.ChainContextSubstBuilder,
+    "gsub_contextchain": otl.ChainContextSubstBuilder,
+    "gpos_single": otl.SinglePosBuilder,
+    "gpos_pair": otl.PairPosBuilder,
+    "gpos_cursive": otl.CursivePosBuilder,
+    "gpos_mark2base": otl.MarkBasePosBuilder,
+    "gpos_mark2ligature": otl.MarkLigPosBuilder,
+    "gpos_mark2mark": otl.MarkMarkPosBuilder,
+    "gpos_context": otl.ChainContextPosBuilder,
+    "gpos_contextchain": otl.ChainContextPosBuilder,
+}
+
+_GLYPH_CLASSES = {"base": 1, "ligature": 2, "mark": 3, "component": 4}
+
+_VALUE_NAMES = ("XPlacement", "YPlacement", "XAdvance", "YAdvance")
+
+
+def _anchor(anchor):
+    if not anchor:
+        return None
+    return otl.buildAnchor(otRound(anchor[0]), otRound(anchor[1]))
+
+
+def _value(values, pair=False):
+    # Zeros are left out, like feaLib does.
+    value = {name: v for name, v in zip(_VALUE_NAMES, values) if v}
+    if pair and not value:
+        value = {"XAdvance": 0}
+    return otl.buildValue(value)
+
+
+def _isChain(builder):
+    return isinstance(builder, otl.ChainContextualBuilder)
+
+
+class LayoutSFDParser(SFDParser):
+    """Parses an SFD file or SFDIR directory, without writing a feature file.
+
+    Call buildTables() once parsed to turn the lookups of the font into GSUB,
+    GPOS and GDEF tables with the fontTools.otlLib builders, the tables feaLib
+    would build from the feature file. Kerning classes become class based pair
+    positioning subtables as they are, without being expanded to glyph pairs.
+    Mark attachment classes and mark filtering sets keep their FontForge
+    numbering.
+    """
+
+    def _writeGSUBGPOS(self, isgpos=False):
+        pass
+
+    def _writeGDEF(self):
+        # Categories are still guessed, they are in the font lib.
+        self._glyphCategories()
+
+    def buildTables(self, ttFont):
+        """Add the GSUB, GPOS and GDEF tables of the parsed font to ttFont.
+
+        The glyph order of ttFont must have every glyph of the font.
+        """
+        # Builders of the lookups with rules, by lookup name.
+        builders = {}
+        for tag in ("GSUB", "GPOS"):
+            table = self._buildTable(ttFont, tag == "GPOS", builders)
+            if table is not None:
+                ttFont[tag] = newTable(tag)
+                ttFont[tag].table = table
+
+        gdef = self._buildGDEF(ttFont)
+        if gdef is not None:
+            ttFont["GDEF"] = newTable("GDEF")
+            ttFont["GDEF"].table = gdef
+
+    def _lookupBuilder(self, ttFont, lookup):
+        kind, flag, _ = self._lookupInfo[lookup]
+        builder = _LOOKUP_BUILDERS[kind](ttFont, None)
+
+        value, markAttach, markSet = self._lookupFlags(flag)
+        if markAttach is not None:
+            names = [name for name, _ in self._markAttachClasses]
+            value |= (names.index(markAttach) + 1) << 8
+        if markSet is not None:
+            names = [name for name, _ in self._markAttachSets]
+            builder.markFilterSet = names.index(markSet)
+        builder.lookupflag = value
+        return builder
+
+    def _addAnchorClass(self, builder, lookup, subtable):
+        kind, _, _ = self._lookupInfo[lookup]
+        cursives, marks, bases = self._anchorClassRecords(lookup, subtable)
+
+        for glyph, entry, exit in cursives:
+            builder.add_attachment(None, [glyph], _anchor(entry), _anchor(exit))
+
+        for glyph, anchor, anchorClass in marks:
+            builder.marks[glyph] = (anchorClass, _anchor(anchor))
+
+        if bases:
+            assert kind != "gpos_mark2ligature"  # XXX
+        if kind == "gpos_mark2mark":
+            baseAnchors = builder.baseMarks
+        else:
+            baseAnchors = getattr(builder, "bases", {})
+        for glyph, anchor, anchorClass in bases:
+            baseAnchors.setdefault(glyph, {})[anchorClass] = _anchor(anchor)
+
+        return len(cursives) + len(marks) + len(bases)
+
+    def _addKernClass(self, builder, subtable):
+        groups1, groups2, kerns = self._kernClasses[subtable]
+        # Sorted, as feaLib has them, to get the same class definitions.
+        classes1 = [group and tuple(sorted(set(group))) for group in groups1]
+        classes2 = [group and tuple(sorted(set(group))) for group in groups2]
+        count = 0
+        for j, k, kern in kerns:
+            if groups1[j] and groups2[k]:
+                value = otl.buildValue({"XAdvance": kern})
+                builder.addClassPair(None, classes1[j], value, classes2[k], None)
+                count += 1
+        return count
+
+    def _addKernPairs(self, builder, subtable):
+        count = 0
+        for name1 in self._kernPairs[subtable]:
+            for gid2, kern in self._kernPairs[subtable][name1]:
+                name2 = self._glyphOrder[gid2]
+                value = otl.buildValue({"XAdvance": kern})
+                builder.addGlyphPair(None, name1, value, name2, None)
+                count += 1
+        return count
+
+    def _addChainPosSub(self, builder, subtable):
+        _, match, back, ahead, lookups = self._chainPosSub[subtable]
+        # Lookup names for now, see _resolveChainLookups().
+        nested = [lookups.get(i) for i in range(len(match))]
+        builder.rules.append(otl.ChainContextualRule(back, match, ahead, nested))
+        return 1
+
+    def _resolveChainLookups(self, builder, tableLookups, builders):
+        """Replace the lookup names applied by the rules of a contextual lookup
+        with the builders of the lookups."""
+        for rule in builder.rules:
+            for i, names in enumerate(rule.lookups):
+                used = []
+                for name in names or []:
+                    if name not in tableLookups:
+                        raise Exception(
+                            f"Contextual rule applies unknown lookup: {name}"
+                        )
+                    # Lookups without rules are dropped, applying them does
+                    # nothing.
+                    if name in builders:
+                        used.append(builders[name])
+                rule.lookups[i] = used or None
+
+    def _addPosSub(self, builder, kind, subtable):
+        entries = self._subtablePosSub.get(subtable, [])
+        for glyph, _, possub in entries:
+            if kind == "gsub_single":
+                builder.mapping[glyph] = possub[0]
+            elif kind == "gsub_multiple":
+                builder.mapping[glyph] = tuple(possub)
+            elif kind == "gsub_alternate":
+                builder.alternates[glyph] = list(possub)
+            elif kind == "gsub_ligature":
+                builder.ligatures[tuple(possub)] = glyph
+            elif kind == "gpos_single":
+                builder.add_pos(None, glyph, _value(possub))
+            elif kind == "gpos_pair":
+                value1 = _value(possub[1:5], pair=True)
+                value2 = _value(possub[5:], pair=True)
+                builder.addGlyphPair(None, glyph, value1, possub[0], value2)
+            else:
+                assert False, (kind, possub)
+        return len(entries)
+
+    def _fillLookup(self, builder, lookup, subtables):
+        """Add the rules of the subtables of lookup, return how many."""
+        kind, _, _ = self._lookupInfo[lookup]
+        count = 0
+        for subtable in subtables:
+            if subtable in self._anchorClasses:
+                count += self._addAnchorClass(builder, lookup, subtable)
+            elif subtable in self._kernClasses:
+                count += self._addKernClass(builder, subtable)
+            elif subtable in self._kernPairs:
+                count += self._addKernPairs(builder, subtable)
+            elif subtable in self._chainPosSub:
+                count += self._addChainPosSub(builder, subtable)
+            else:
+                count += self._addPosSub(builder, kind, subtable)
+        return count
+
+    def _buildTable(self, ttFont, isgpos, builders):
+        lookups, features = self._tableLookups(isgpos)
+        if not lookups:
+            return None
+
+        for lookup, subtables in lookups.items():
+            builder = self._lookupBuilder(ttFont, lookup)
+            if self._fillLookup(builder, lookup, subtables):
+                builders[lookup] = builder
+
+        # Contextual lookups can apply any other lookup of the table, resolve
+        # them once it is known which ones have rules.
+        tableLookups = self._gposLookups if isgpos else self._gsubLookups
+        tableBuilders = {l: builders[l] for l in lookups if l in builders}
+        for builder in tableBuilders.values():
+            if _isChain(builder):
+                self._resolveChainLookups(builder, tableLookups, tableBuilders)
+
+        # Lookups are indexed in font order, which is not the order above.
+        used = [l for l in lookups if l in builders]
+        for i, lookup in enumerate(used):
+            builders[lookup].lookup_index = i
+        indices = {self._santizeLookupName(l): i for i, l in enumerate(used)}
+
+        table = getattr(otTables, isgpos and "GPOS" or "GSUB")()
+        table.Version = 0x00010000
+        table.LookupList = otTables.LookupList()
+        table.LookupList.Lookup = [builders[l].build() for l in used]
+        table.LookupList.LookupCount = len(used)
+        self._buildFeatures(table, features, indices)
+        return table
+
+    def _buildFeatures(self, table, features, indices):
+        # Same feature and script lists as feaLib’s: features sorted by tag,
+        # language and script, and shared by languages with the same lookups.
+        langSys = {}
+        for feature, scripts in features.items():
+            for script, languages in scripts.items():
+                for language, names in languages.items():
+                    key = (feature, language, script)
+                    langSys[key] = tuple(
+                        dict.fromkeys(indices[n] for n in names if n in indices)
+                    )
+
+        table.FeatureList = otTables.FeatureList()
+        table.FeatureList.FeatureRecord = []
+        featureIndices = {}
+        scriptFeatures = {}
+        for key, lookupIndices in sorted(langSys.items()):
+            if not lookupIndices:
+                continue
+            feature, language, script = key
+            featureKey = (feature, frozenset(lookupIndices))
+            if featureKey not in featureIndices:
+                record = otTables.FeatureRecord()
+                record.FeatureTag = feature
+                record.Feature = otTables.Feature()
+                record.Feature.FeatureParams = None
+                record.Feature.LookupListIndex = list(lookupIndices)
+                record.Feature.LookupCount = len(lookupIndices)
+                featureIndices[featureKey] = len(table.FeatureList.FeatureRecord)
+                table.FeatureList.FeatureRecord.append(record)
+            index = featureIndices[featureKey]
+            scriptFeatures.setdefault(script, {}).setdefault(language, []).append(index)
+        table.FeatureList.FeatureCount = len(table.FeatureList.FeatureRecord)
+
+        table.ScriptList = otTables.ScriptList()
+        table.ScriptList.ScriptRecord = []
+        for script, languages in sorted(scriptFeatures.items()):
+            record = otTables.ScriptRecord()
+            record.ScriptTag = script
+            record.Script = otTables.Script()
+            record.Script.DefaultLangSys = None
+            record.Script.LangSysRecord = []
+            for language, featureIndex in sorted(languages.items()):
+                langSys = otTables.LangSys()
+                langSys.LookupOrder = None
+                langSys.ReqFeatureIndex = 0xFFFF
+                langSys.FeatureIndex = featureIndex
+                langSys.FeatureCount = len(featureIndex)
+                if language == "dflt":
+                    record.Script.DefaultLangSys = langSys
+                else:
+                    langRecord = otTables.LangSysRecord()
+                    langRecord.LangSysTag = language
+                    langRecord.LangSys = langSys
+                    record.Script.LangSysRecord.append(langRecord)
+            record.Script.LangSysCount = len(record.Script.LangSysRecord)
+            table.ScriptList.ScriptRecord.append(record)
+        table.ScriptList.ScriptCount = len(table.ScriptList.ScriptRecord)
+
+    def _buildGDEF(self, ttFont):
+        glyphMap = ttFont.getReverseGlyphMap()
+        gdef = otTables.GDEF()
+
+        categories = self._font.lib[CATEGORIES_KEY]
+        classes = {
+            name: _GLYPH_CLASSES[category]
+            for name, category in categories.items()
+            if category in _GLYPH_CLASSES
+        }
+        gdef.GlyphClassDef = None
+        if classes:
+            gdef.GlyphClassDef = otTables.GlyphClassDef()
+            gdef.GlyphClassDef.classDefs = classes
+
+        gdef.AttachList = None
+        gdef.LigCaretList = otl.buildLigCaretList(self._ligatureCarets, {}, glyphMap)
+
+        markAttach = {}
+        for i, (_, glyphs) in enumerate(self._markAttachClasses):
+            for glyph in glyphs.split():
+                markAttach[glyph] = i + 1
+        gdef.MarkAttachClassDef = None
+        if markAttach:
+            gdef.MarkAttachClassDef = otTables.MarkAttachClassDef()
+            gdef.MarkAttachClassDef.classDefs = markAttach
+
+        markSets = [glyphs.split() for _, glyphs in self._markAttachSets]
+        gdef.MarkGlyphSetsDef = otl.buildMarkGlyphSetsDef(markSets, glyphMap)
+        gdef.Version = 0x00010002 if gdef.MarkGlyphSetsDef else 0x00010000
+
+        if not any(
+            (
+                gdef.GlyphClassDef,
+                gdef.LigCaretList,
+                gdef.MarkAttachClassDef,
+                gdef.MarkGlyphSetsDef,
+            )
+        ):
+            return None
+        return gdef
@@ -0,0 +1,113 @@
+from ufoLib2 import Font
+
+from .index import SFDIndex
+from .parser import CATEGORIES_KEY, GlyphOrder, SFDParser
+
+
+class LazySFDFont:
+    """An SFD font whose glyphs are parsed on first access.
+
+    The header, lookups and kerning are parsed when the font is opened, while
+    each glyph’s outlines, references and anchors are only parsed into the
+    underlying ufoLib2 font the first time the glyph is accessed. Processing
+    that needs every glyph (feature writing, offset metrics and UFO anchor
+    fixups) is not done.
+    """
+
+    def __init__(self, path, ufo_anchors=False, ufo_kerning=False, minimal=False):
+        self.font = Font()
+        self._index = index = SFDIndex(path)
+        self._parser = parser = SFDParser(
+            path, self.font, ufo_anchors, ufo_kerning, minimal
+        )
+
+        parser._parseHeader(index.headerLines())
+        parser._newLayers()
+        parser._fixFontInfo()
+        self.font.lib[CATEGORIES_KEY] = {}
+
+        parser._glyphOrder = GlyphOrder(dict(zip(index.names, index.orders)))
+        unicodes = {name: self._unicode(name) for name in index.names}
+        self.font.glyphOrder = parser._glyphOrder.sort(unicodes)
+
+        for idx, name in enumerate(index.names):
+            for value in index.recordValues(idx, "Kerns2"):
+                parser._parseKerns(name, value)
+        parser._processUFOKerning()
+
+    def _unicode(self, name):
+        index = self._index
+        idx = index.find(name)
+        unicode = index.unicodes[idx]
+        if unicode is not None and unicode >= 0:
+            return unicode
+        if index.recordValue(idx, "AltUni2") is not None:
+            # Rare enough that it is not worth parsing AltUni2 separately.
+            return self[name].unicode
+        return None
+
+    def _load(self, name):
+        parser = self._parser
+        parser._parseGlyphs([self._index.recordLines(self._index.find(name))])
+        for (refName, layerIdx), refs in parser._glyphRefs.items():
+            parser._addReferences(refName, layerIdx, refs)
+        parser._glyphRefs.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._index.close()
+
+    @property
+    def info(self):
+        return self.font.info
+
+    @property
+    def lib(self):
+        return self.font.lib
+
+    @property
+    def groups(self):
+        return self.font.groups
+
+    @property
+    def kerning(self):
+        return self.font.kerning
+
+    @property
+    def glyphOrder(self):
+        return self.font.glyphOrder
+
+    def keys(self):
+        """Return the glyph names in output order."""
+        return self._parser._glyphOrder.output
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        for name in self._parser._glyphOrder.output:
+            yield self[name]
+
+    def __getitem__(self, name):
+        return self.glyph(name)
+
+    def get(self, name, default=None):
+        if name not in self:
+            return default
+        return self[name]
+
+    def glyph(self, name, layer=None):
+        """Return the glyph from the given layer, the default one if None."""
+        if name not in self.font.layers.defaultLayer:
+            self._load(name)
+        if layer is None:
+            return self.font.layers.defaultLayer[name]
+        return self.font.layers[layer][name]
@@ -0,0 +1,143 @@
+import gc
+import sys
+import tracemalloc
+import types
+
+from .profiler import Profiler
+
+# Parser structures measured by MemoryProfiler.measure().
+STRUCTURES = {
+    "glyphPosSub": lambda parser: parser._glyphPosSub,
+    "subtablePosSub": lambda parser: parser._subtablePosSub,
+    "kernPairs": lambda parser: parser._kernPairs,
+    "kernClasses": lambda parser: parser._kernClasses,
+    "glyphAnchors": lambda parser: parser._glyphAnchors,
+    "anchorClassGlyphs": lambda parser: parser._anchorClassGlyphs,
+    "glyphRefs": lambda parser: parser._glyphRefs,
+    "layers": lambda parser: parser._font.layers,
+    "features": lambda parser: parser._font.features.text,
+}
+
+_SKIP_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType)
+
+# Leave out the allocations of the profiling itself.
+_SKIP_FILES = (tracemalloc.__file__, __file__)
+
+
+def maxRSS():
+    """Return the peak resident set size of the process in bytes, or None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes everywhere but on macOS.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _site(frame):
+    if frame is None:
+        return "<unknown>"
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _objects(root):
+    """Yield root and every object reachable from it, once."""
+    seen = set()
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIP_TYPES):
+            continue
+        seen.add(id(obj))
+        yield obj
+        stack.extend(gc.get_referents(obj))
+
+
+class MemoryProfiler(Profiler):
+    """A Profiler that also reports memory use, with tracemalloc.
+
+    After each phase, the memory traced at its end, its peak and the peak RSS
+    of the process so far are recorded. measure() then takes a snapshot of the
+    memory of a parser that is done parsing: the source lines that allocated
+    most of it, and how much the main parser structures hold and where that
+    was allocated.
+
+    Tracing starts when the profiler is created, and makes everything a lot
+    slower, so times are not comparable with those of a plain Profiler.
+    """
+
+    def __init__(self, cprofile=None, top=10):
+        super().__init__(cprofile)
+        self.sites = []
+        self.structures = {}
+        self._top = top
+        tracemalloc.start()
+
+    def _phaseStart(self, name):
+        tracemalloc.reset_peak()
+
+    def _phaseDone(self, phase):
+        current, peak = tracemalloc.get_traced_memory()
+        phase.update(traced=current, peak=peak, maxRSS=maxRSS())
+
+    def measure(self, parser):
+        """Measure the memory held by a parser that is done parsing."""
+        stats = tracemalloc.take_snapshot().statistics("lineno")
+        stats = [s for s in stats if s.traceback[0].filename not in _SKIP_FILES]
+        self.sites = [
+            dict(site=_site(stat.traceback[0]), size=stat.size, count=stat.count)
+            for stat in stats[: self._top]
+        ]
+
+        for name, get in STRUCTURES.items():
+            size = count = 0
+            sites = {}
+            for obj in _objects(get(parser)):
+                objSize = sys.getsizeof(obj)
+                traceback = tracemalloc.get_object_traceback(obj)
+                frame = traceback[0] if traceback is not None else None
+                sites[frame] = sites.get(frame, 0) + objSize
+                size += objSize
+                count += 1
+            sites = sorted(sites.items(), key=lambda s: -s[1])[: self._top]
+            self.structures[name] = dict(
+                size=size,
+                objects=count,
+                sites=[dict(site=_site(f), size=n) for f, n in sites],
+            )
+
+    def asDict(self):
+        result = super().asDict()
+        result["sites"] = self.sites
+        result["structures"] = self.structures
+        return result
+
+    def report(self):
+        lines = [super().report(), ""]
+        for phase in self.phases:
+            lines.append(
+                f"{phase['name']}: traced {_size(phase['traced'])}, "
+                f"peak {_size(phase['peak'])}, max RSS {_size(phase['maxRSS'])}"
+            )
+        if self.sites:
+            lines += ["", "Top allocation sites:"]
+            for site in self.sites:
+                lines.append(f"  {_size(site['size']):>10}  {site['site']}")
+        for name, structure in self.structures.items():
+            lines += [
+                "",
+                f"{name}: {_size(structure['size'])} in "
+                f"{structure['objects']} objects",
+            ]
+            for site in structure["sites"]:
+                lines.append(f"  {_size(site['size']):>10}  {site['site']}")
+        return "\n".join(lines)
+
+
+def _size(size):
+    if size is None:
+        return "?"
+    if abs(size) < 2**20:
+        return f"{size / 2**10:.1f} kB"
+    return f"{size / 2**20:.1f} MB"
@@ -0,0 +1,113 @@
+from array import array
+
+from ufoLib2.objects import Contour, Point
+from ufoLib2.objects.misc import BoundingBox
+
+# Point types as stored in Outline.types.
+OFFCURVE, MOVE, LINE, CURVE, QCURVE = range(5)
+POINT_TYPES = (None, "move", "line", "curve", "qcurve")
+
+
+class ContourView:
+    """A read-only view of one contour of an Outline."""
+
+    __slots__ = ("_outline", "_start", "_end")
+
+    def __init__(self, outline, start, end):
+        self._outline = outline
+        self._start = start
+        self._end = end
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __iter__(self):
+        """Yield the (x, y, type, smooth) tuple of each point."""
+        outline = self._outline
+        coords = outline.coords
+        for i in range(self._start, self._end):
+            pointType = POINT_TYPES[outline.types[i]]
+            yield coords[2 * i], coords[2 * i + 1], pointType, bool(outline.flags[i])
+
+    @property
+    def open(self):
+        return self._outline.types[self._start] == MOVE
+
+    def toContour(self):
+        return self._outline._contours(self._start, self._end)[0]
+
+
+class Outline:
+    """The contours of one glyph, stored in flat arrays.
+
+    coords holds alternating x and y values of all the points, types the type
+    of each point (one of the constants above), flags whether each point is
+    smooth, and ends the index after the last point of each contour. This is a
+    fraction of the memory the same contours take as ufoLib2 objects.
+    """
+
+    __slots__ = ("coords", "types", "flags", "ends")
+
+    def __init__(self):
+        self.coords = array("d")
+        self.types = bytearray()
+        self.flags = bytearray()
+        self.ends = array("L")
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, index):
+        ends = self.ends
+        end = ends[index]
+        index = index % len(ends)
+        return ContourView(self, ends[index - 1] if index else 0, end)
+
+    def __iter__(self):
+        for index in range(len(self.ends)):
+            yield self[index]
+
+    def extend(self, other):
+        offset = len(self.types)
+        self.coords.extend(other.coords)
+        self.types.extend(other.types)
+        self.flags.extend(other.flags)
+        self.ends.extend(end + offset for end in other.ends)
+
+    def _contours(self, start, end):
+        coords = self.coords
+        points = list(
+            map(
+                Point,
+                coords[2 * start : 2 * end : 2],
+                coords[2 * start + 1 : 2 * end : 2],
+                map(POINT_TYPES.__getitem__, self.types[start:end]),
+                map(bool, self.flags[start:end]),
+            )
+        )
+        contours = []
+        for contourEnd in self.ends:
+            if start < contourEnd <= end:
+                contours.append(Contour(points=points[: contourEnd - start]))
+                del points[: contourEnd - start]
+                start = contourEnd
+        return contours
+
+    def contours(self):
+        """Return the contours as ufoLib2 Contour objects."""
+        return self._contours(0, len(self.types))
+
+    def drawPoints(self, pointPen):
+        for contour in self:
+            pointPen.beginPath()
+            for x, y, pointType, smooth in contour:
+                pointPen.addPoint((x, y), pointType, smooth)
+            pointPen.endPath()
+
+    def controlBounds(self):
+        coords = self.coords
+        if not coords:
+            return None
+        xs = coords[0::2]
+        ys = coords[1::2]
+        return BoundingBox(min(xs), min(ys), max(xs), max(ys))
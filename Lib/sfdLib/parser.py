@@ -1,12 +1,20 @@
 import codecs
+import contextlib
+from array import array
+import io
+import itertools
 import math
 import os
 import re
 
 from datetime import datetime
+from fontTools.feaLib import ast
 from fontTools.misc.fixedTools import otRound
+from ufoLib2.objects.misc import unionBounds
 import sfdutf7
 
+from .outlines import CURVE, LINE, MOVE, OFFCURVE, QCURVE, Outline
+
 SFDReadUTF7 = lambda s, force_valid_xml=True: sfdutf7.decode(
     s.encode("ascii"), unquote=True, force_valid_xml=force_valid_xml
 )
@@ -15,7 +23,8 @@ SFDReadUTF7 = lambda s, force_valid_xml=True: sfdutf7.decode(
 QUOTED_RE = re.compile('(".*?")')
 NUMBER_RE = re.compile("(-?\d*\.*\d+)")
 LAYER_RE = re.compile("(.)\s+(.)\s+" + QUOTED_RE.pattern + "(?:\s+.)?")
-GLYPH_SEGMENT_RE = re.compile("(\s[lmc]\s)")
+SPLINESET_RE = re.compile("^(?:Named[^:]*: (.*)|(.*?)\s([mlc])\s(\d+).*)$", re.M)
+SPIRO_RE = re.compile("^Spiro$.*?^EndSpiro$", re.M | re.S)
 KERNS_RE = re.compile(
     NUMBER_RE.pattern + "\s+" + NUMBER_RE.pattern + "\s+" + QUOTED_RE.pattern
 )
@@ -51,6 +60,8 @@ CHAIN_POSSUB_RE = re.compile(
     "(coverage|class|glyph)\s+" + QUOTED_RE.pattern + "\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)"
 )
 CHAIN_COVERAGE_RE = re.compile("")
+STARTCHAR_RE = re.compile(r"^StartChar:\s*(.*?)\s*$", re.M)
+ENCODING_RE = re.compile(r"^Encoding:\s*\S+\s+\S+\s+(\S+)", re.M)
 
 SFDLIB_PREFIX = "org.sfdlib"
 DECOMPOSEREMOVEOVERLAP_KEY = SFDLIB_PREFIX + ".decomposeAndRemoveOverlap"
@@ -65,15 +76,210 @@ def _splitList(data, n):
     return [data[i : i + n] for i in range(0, len(data), n)]
 
 
+def _decodeSplineSet(lines):
+    """Decode the lines of a SplineSet section in one go.
+
+    Returns the coordinates of all points as a flat array of alternating x and
+    y values, a string with the type of each segment ("m", "l" or "c"), an
+    array with the flags of each segment, and the names of named contours
+    keyed by contour index.
+    """
+    text = "\n".join(lines)
+    if "Spiro" in text:
+        text = SPIRO_RE.sub("", text)
+
+    coords = []
+    types = []
+    flags = []
+    names = {}
+    contour = -1
+    for name, pts, segmentType, flag in SPLINESET_RE.findall(text):
+        if segmentType:
+            if segmentType == "m":
+                contour += 1
+            coords.append(pts)
+            types.append(segmentType)
+            flags.append(flag)
+        else:
+            names[contour] = SFDReadUTF7(name)
+
+    coords = array("d", map(float, " ".join(coords).split()))
+    types = "".join(types)
+    flags = array("l", map(int, flags))
+    # Move and line segments have one point, curves three.
+    assert len(coords) == 2 * (len(types) + 2 * types.count("c"))
+
+    return coords, types, flags, names
+
+
+def _splitContours(types):
+    """Yield the segment range and first point index of each contour."""
+    start = first = point = 0
+    for i, segmentType in enumerate(types):
+        if segmentType == "m" and i:
+            yield start, i, first
+            start, first = i, point
+        point += 3 if segmentType == "c" else 1
+    if types:
+        yield start, len(types), first
+
+
+def _headerKeyValue(line):
+    if ":" in line:
+        key, value = [v.strip() for v in line.split(":", 1)]
+        return key, value
+    return line.strip(), None
+
+
+def _charKeyValue(line):
+    if ": " in line:
+        key, value = line.split(": ", 1)
+        return key, value
+    return line, None
+
+
+def _strippedLines(lines):
+    """Yield stripped lines, dropping empty ones."""
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def _sectionLines(lines, end):
+    """Lazily yield lines up to the one starting with end, consuming it."""
+    for line in lines:
+        if line.startswith(end):
+            return
+        yield line
+
+
+def _tokenize(lines, sections, splitLine=_headerKeyValue):
+    """Yield (key, value, section) records from an iterator of lines.
+
+    sections maps keywords that start a multi-line record either to the
+    keyword ending it, or to a callable returning the number of lines that
+    follow it given the record value. section is None for single line records,
+    otherwise a lazy iterator over the lines of the record; whatever the caller
+    does not consume is skipped before reading the next record.
+    """
+    lines = iter(lines)
+    for line in lines:
+        key, value = splitLine(line)
+        end = sections.get(key)
+        if end is None:
+            yield key, value, None
+            continue
+        if isinstance(end, str):
+            section = _sectionLines(lines, end)
+        else:
+            section = itertools.islice(lines, end(value))
+        yield key, value, section
+        for _ in section:
+            pass
+
+
+def _kernClassHeader(value):
+    m = KERNCLASS_RE.match(value)
+    n1, plus, n2, name = m.groups()
+    classstart = 1
+    if plus:
+        classstart = 0
+    return int(n1), classstart, int(n2), name
+
+
+def _kernClassLineCount(value):
+    n1, classstart, n2, _ = _kernClassHeader(value)
+    return (n1 - classstart) + (n2 - 1) + 1
+
+
 def _dumpAnchor(anchor):
     if not anchor:
         return "<anchor NULL>"
     return f"<anchor {otRound(anchor[0])} {otRound(anchor[1])}>"
 
 
-def _sortGlyphs(font):
+def _feaAnchor(anchor):
+    if not anchor:
+        return None
+    return ast.Anchor(otRound(anchor[0]), otRound(anchor[1]))
+
+
+def _feaTag(tag):
+    # Padded like feaLib pads the tags it parses.
+    return (tag + "    ")[:4]
+
+
+def _buildOutline(splineSet, quadratic):
+    """Convert decoded SplineSet arrays to an Outline of UFO points."""
+    coords, types, flags, _ = splineSet
+    outline = Outline()
+    points = outline.coords
+    pointTypes = outline.types
+    smooths = outline.flags
+    for start, end, point in _splitContours(types):
+        forceOpen = False
+        first = len(pointTypes)
+        i = 2 * point
+        for j in range(start, end):
+            segmentType = types[j]
+            flag = flags[j]
+
+            if flag & 0x400:  # SFD_PTFLAG_FORCE_OPEN_PATH
+                forceOpen = True
+            smooth = (flag & 0x3) != 1
+
+            if segmentType == "m":
+                points.extend(coords[i : i + 2])
+                pointTypes.append(MOVE)
+                smooths.append(smooth)
+                i += 2
+            elif segmentType == "l":
+                points.extend(coords[i : i + 2])
+                pointTypes.append(LINE)
+                smooths.append(smooth)
+                i += 2
+            else:
+                curve = CURVE
+                if quadratic:
+                    curve = QCURVE
+
+                    # XXX I don’t know what I’m doing
+                    assert coords[i : i + 2] == coords[i + 2 : i + 4]
+                    i += 2
+
+                    if flag & 0x80:  # SFD_PTFLAG_INTERPOLATE
+                        points.extend(coords[i : i + 4])
+                        pointTypes.extend((OFFCURVE, OFFCURVE))
+                        smooths.extend((False, False))
+                        i += 4
+                        continue
+                else:
+                    points.extend(coords[i : i + 2])
+                    pointTypes.append(OFFCURVE)
+                    smooths.append(False)
+                    i += 2
+
+                points.extend(coords[i : i + 4])
+                pointTypes.extend((OFFCURVE, curve))
+                smooths.extend((False, smooth))
+                i += 4
+
+        # Closed path, the last point replaces the first one.
+        if not forceOpen and len(pointTypes) - first > 1:
+            if points[2 * first : 2 * first + 2] == points[-2:]:
+                pointTypes[first] = pointTypes.pop()
+                smooths[first] = smooths.pop()
+                del points[-2:]
+
+        outline.ends.append(len(pointTypes))
+
+    return outline
+
+
+def _sortGlyphs(order, unicodes):
     """Emulate how FontForge orders output glyphs."""
-    order = list(font.glyphOrder)
+    gids = {name: gid for gid, name in enumerate(order)}
 
     def sort(name):
         # .notdef, .null, and nonmarkingreturn come first
@@ -85,14 +291,65 @@ def _sortGlyphs(font):
             return 2
         # Then encoded glyph in the encoding order (we are assuming Unicode
         # here, because meh).
-        g = font[name]
-        if g.unicode is not None:
-            return g.unicode + 3
+        unicode = unicodes[name]
+        if unicode is not None:
+            return unicode + 3
         # Then in the font order, we are adding 0x10FFFF here to make sure they
         # sort after Unicode.
-        return order.index(name) + 0x10FFFF + 3
+        return gids[name] + 0x10FFFF + 3
+
+    return sorted(order, key=sort)
+
 
-    return sorted(font.glyphOrder, key=sort)
+class _Char:
+    """The glyph record being parsed."""
+
+    __slots__ = ("name", "glyph", "layerIdx", "unicodes", "order")
+
+    def __init__(self, name, glyph):
+        self.name = name
+        self.glyph = glyph
+        self.layerIdx = None
+        self.unicodes = []
+        self.order = None
+
+
+class GlyphOrder:
+    """The glyphs of a font in FontForge GID order and in output order.
+
+    FontForge refers to other glyphs by GID (in references and kerning pairs),
+    while fonts are written out in a different order, see _sortGlyphs().
+    """
+
+    def __init__(self, orders):
+        self.names = sorted(orders, key=orders.get)
+        self.gids = {name: gid for gid, name in enumerate(self.names)}
+        self.output = self.names
+        self.positions = self.gids
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, gid):
+        """Return the name of the glyph with the given GID."""
+        return self.names[gid]
+
+    def sort(self, unicodes):
+        """Compute the output order from the glyph name to Unicode mapping."""
+        self.output = _sortGlyphs(self.names, unicodes)
+        self.positions = {name: i for i, name in enumerate(self.output)}
+        return self.output
+
+
+def _setInfo(attr, convert=None):
+    """Return a header handler that sets a font info attribute."""
+
+    def handler(parser, key, value, section):
+        if convert is not None:
+            value = convert(value)
+        setattr(parser._font.info, attr, value)
+
+    return handler
 
 
 def _parseVersion(version):
@@ -125,25 +382,37 @@ def _kernClassesToUFO(subtables):
     kerning = {}
 
     for i, (groups1, groups2, kerns) in enumerate(subtables):
-        for j, group1 in enumerate(groups1):
-            for k, group2 in enumerate(groups2):
-                kern = kerns[(j * len(groups2)) + k]
-                if group1 is not None and group2 is not None and kern != 0:
-                    name1 = f"public.kern1.kc{i}_{j}"
-                    name2 = f"public.kern2.kc{i}_{k}"
-                    if name1 not in groups:
-                        groups[name1] = group1
-                    if name2 not in groups:
-                        groups[name2] = group2
-                    assert groups[name1] == group1
-                    assert groups[name2] == group2
-                    kerning[name1, name2] = kern
+        for j, k, kern in kerns:
+            group1 = groups1[j]
+            group2 = groups2[k]
+            if group1 is not None and group2 is not None:
+                name1 = f"public.kern1.kc{i}_{j}"
+                name2 = f"public.kern2.kc{i}_{k}"
+                if name1 not in groups:
+                    groups[name1] = group1
+                if name2 not in groups:
+                    groups[name2] = group2
+                assert groups[name1] == group1
+                assert groups[name2] == group2
+                kerning[name1, name2] = kern
 
     return groups, kerning
 
 
 class SFDParser:
-    """Parses an SFD file or SFDIR directory."""
+    """Parses an SFD file or SFDIR directory.
+
+    With feature_ast, the OpenType layout features are built as a feaLib
+    FeatureFile, the featureFile attribute, instead of the feature file text of
+    the font. str(featureFile) gives equivalent text when needed, but anything
+    compiling features in the same process can use the tree without parsing it.
+
+    With compact, glyph outlines are kept in flat arrays instead of ufoLib2
+    objects, and only converted when a glyph is accessed. For fonts with many
+    outline points this cuts the peak memory of parsing by up to about two
+    thirds, but saving the font still converts every glyph, so it helps only
+    until then.
+    """
 
     def __init__(
         self,
@@ -152,20 +421,33 @@ class SFDParser:
         ufo_anchors=False,
         ufo_kerning=False,
         minimal=False,
+        jobs=1,
+        compact=False,
+        profiler=None,
+        feature_ast=False,
     ):
         self._path = path
         self._font = font
         self._use_ufo_anchors = ufo_anchors
         self._use_ufo_kerning = ufo_kerning
         self._minimal = minimal
+        self._jobs = jobs
+        self._compact = compact
+        self._profiler = profiler
 
         self._layers = []
         self._layerType = []
+        self._offsetMetrics = []
+        self._headerRecords = 0
+        # Outline stores of the layers, by index, when compact.
+        self._outlines = {}
 
         self._glyphRefs = {}
         self._glyphAnchors = {}
+        self._anchorClassGlyphs = {}
         self._glyphPosSub = {}
-        self._glyphOrder = {}
+        self._subtablePosSub = {}
+        self._glyphOrder = GlyphOrder({})
 
         self._chainPosSub = {}
         self._anchorClasses = {}
@@ -176,9 +458,20 @@ class SFDParser:
         self._gsubLookups = {}
         self._gposLookups = {}
         self._lookupInfo = {}
+        self._featureLookups = {}
         self._ligatureCarets = {}
 
+        self.featureFile = ast.FeatureFile() if feature_ast else None
+        # Glyph classes, mark classes and lookup blocks of featureFile, by name.
+        self._feaClasses = {}
+        self._feaMarkClasses = {}
+        self._feaLookups = {}
+
         self._sanitizedLookupNames = {}
+        # Reverse of the above, and the next suffix to try for each prefix of
+        # generated names.
+        self._usedLookupNames = set()
+        self._lookupNameSuffixes = {}
 
     def _parseAltuni(self, name, altuni):
         unicodes = []
@@ -193,14 +486,14 @@ class SFDParser:
 
         return unicodes
 
-    def _parsePrivateDict(self, data):
+    def _parsePrivateDict(self, value, data):
         info = self._font.info
-        n = int(data.pop(0))
-        assert len(data) == n
+        count = int(value)
 
         StdHW = StdVW = None
 
         for line in data:
+            count -= 1
             key, n, value = [v.strip() for v in line.split(" ", 2)]
             assert len(value) == int(n)
 
@@ -234,6 +527,8 @@ class SFDParser:
             elif key == "StdVW":
                 StdVW = value[0]
 
+        assert count == 0
+
         if StdHW:
             if StdHW in info.postscriptStemSnapH:
                 info.postscriptStemSnapH.pop(info.postscriptStemSnapH.index(StdHW))
@@ -317,142 +612,44 @@ class SFDParser:
                         )
                     )
 
-    def _getSection(self, data, i, end, value=None):
-        section = []
-        if value is not None:
-            section.append(value)
-
-        while not data[i].startswith(end):
-            section.append(data[i])
-            i += 1
-
-        return section, i + 1
-
-    def _parseSplineSet(self, data):
-        contours = []
-
-        i = 0
-        while i < len(data):
-            line = data[i]
-            i += 1
-
-            if line == "Spiro":
-                spiro, i = self._getSection(data, i, "EndSpiro")
-            elif line.startswith("Named"):
-                name = SFDReadUTF7(line.split(": ")[1])
-                contours[-1].append(name)
-            else:
-                pts, segmentType, flags = [
-                    c.strip() for c in GLYPH_SEGMENT_RE.split(line)
-                ]
-                pts = [float(c) for c in pts.split(" ")]
-                pts = _splitList(pts, 2)
-                if segmentType == "m":
-                    assert len(pts) == 1
-                    contours.append([(pts, segmentType, flags)])
-                elif segmentType == "l":
-                    assert len(pts) == 1
-                    contours[-1].append((pts, segmentType, flags))
-                elif segmentType == "c":
-                    assert len(pts) == 3
-                    contours[-1].append((pts, segmentType, flags))
-
-        return contours
-
-    def _drawContours(self, name, layerIdx, contours):
-        quadratic = self._layerType[layerIdx]
-        glyph = self._layers[layerIdx][name]
-        pen = glyph.getPointPen()
-        for contour in contours:
-            forceOpen = False
-            if not isinstance(contour[-1], (tuple, list)):
-                name = contour.pop()
-
-            ufoContour = []
-            for pts, segmentType, flags in contour:
-                flag = flags.split(",")[0]
-                flag = flag.split("x")[0]
-                flag = int(flag)
-
-                if flag & 0x400:  # SFD_PTFLAG_FORCE_OPEN_PATH
-                    forceOpen = True
-                smooth = (flag & 0x3) != 1
-
-                if segmentType == "m":
-                    ufoContour.append((pts[0], "move", smooth))
-                elif segmentType == "l":
-                    ufoContour.append((pts[0], "line", smooth))
-                else:
-                    curve = "curve"
-                    if quadratic:
-                        curve = "qcurve"
-
-                        # XXX I don’t know what I’m doing
-                        assert pts[0] == pts[1]
-                        pts.pop(0)
-
-                        if flag & 0x80:  # SFD_PTFLAG_INTERPOLATE
-                            for pt in pts:
-                                ufoContour.append((pt, None, None))
-                            continue
-
-                    for pt in pts[:-1]:
-                        ufoContour.append((pt, None, None))
-                    ufoContour.append((pts[-1], curve, smooth))
-
-            # Closed path.
-            if not forceOpen and (
-                len(ufoContour) > 1 and ufoContour[0][0] == ufoContour[-1][0]
-            ):
-                ufoContour[0] = ufoContour[-1]
-                ufoContour.pop()
-
-            pen.beginPath()
-            for pt, segmentType, smooth in ufoContour:
-                pen.addPoint(pt, segmentType=segmentType, smooth=smooth)
-            pen.endPath()
+    def _drawContours(self, name, layerIdx, splineSet):
+        outline = _buildOutline(splineSet, self._layerType[layerIdx])
+        if self._compact:
+            self._outlines[layerIdx].add(name, outline)
+        else:
+            self._layers[layerIdx][name].contours.extend(outline.contours())
 
     def _parseGrid(self, data):
         font = self._font
 
-        data = [l.strip() for l in data]
-        contours = self._parseSplineSet(data)
-
-        for contour in contours:
-            name = None
-            p0 = None
-            if not isinstance(contour[-1], (tuple, list)):
-                name = contour.pop()
+        coords, types, _, names = _decodeSplineSet(l.strip() for l in data)
 
-            if len(contour) != 2:
-                # UFO guidelines are simple straight lines, so I can handle any
-                # complex contours here.
+        for contour, (start, end, point) in enumerate(_splitContours(types)):
+            # UFO guidelines are simple straight lines, so I can handle any
+            # complex contours here.
+            if end - start != 2 or types[start + 1] != "l":
                 continue
 
-            for pts, segmentType, flags in contour:
-                if segmentType == "m":
-                    p0 = pts[0]
-                elif segmentType == "l":
-                    p1 = pts[0]
+            p0 = coords[2 * point : 2 * point + 2]
+            p1 = coords[2 * point + 2 : 2 * point + 4]
 
-                    x = None
-                    y = None
-                    angle = None
+            x = None
+            y = None
+            angle = None
 
-                    if p0[0] == p1[0]:
-                        x = p0[0]
-                    elif p0[1] == p1[1]:
-                        y = p0[1]
-                    else:
-                        x = p0[0]
-                        y = p0[1]
-                        angle = math.atan2(p1[0] - p0[0], p1[1] - p0[1])
-                        angle = math.degrees(angle)
-                        if angle < 0:
-                            angle = 360 + angle
-                    font.appendGuideline(dict(x=x, y=y, name=name, angle=angle))
-                else:
-                    p0 = pts[0]
+            if p0[0] == p1[0]:
+                x = p0[0]
+            elif p0[1] == p1[1]:
+                y = p0[1]
+            else:
+                x = p0[0]
+                y = p0[1]
+                angle = math.atan2(p1[0] - p0[0], p1[1] - p0[1])
+                angle = math.degrees(angle)
+                if angle < 0:
+                    angle = 360 + angle
+            name = names.get(contour)
+            font.appendGuideline(dict(x=x, y=y, name=name, angle=angle))
 
     def _parseImage(self, glyph, data):
         pass  # XXX
@@ -460,57 +657,52 @@ class SFDParser:
     def _parseImage2(self, glyph, data):
         pass  # XXX
 
-    def _parseKerns(self, glyph, data):
+    def _parseKerns(self, name, data):
         kerns = KERNS_RE.findall(data)
         assert kerns
         for (gid, kern, subtable) in kerns:
             subtable = SFDReadUTF7(subtable)
             if subtable not in self._kernPairs:
                 self._kernPairs[subtable] = {}
-            if glyph.name not in self._kernPairs[subtable]:
-                self._kernPairs[subtable][glyph.name] = []
+            if name not in self._kernPairs[subtable]:
+                self._kernPairs[subtable][name] = []
             gid = int(gid)
             kern = int(kern)
-            self._kernPairs[subtable][glyph.name].append((gid, kern))
-
-    def _parseKernClass(self, data, i, value):
-        m = KERNCLASS_RE.match(value)
-        groups = m.groups()
-        n1, plus, n2, name = groups
-        classstart = 1
-        if plus:
-            classstart = 0
-        n1 = int(n1)
-        n2 = int(n2)
+            self._kernPairs[subtable][name].append((gid, kern))
+
+    def _parseKernClass(self, value, data):
+        n1, classstart, n2, name = _kernClassHeader(value)
         name = SFDReadUTF7(name)
 
-        first = data[i : i + n1 - classstart]
+        first = itertools.islice(data, n1 - classstart)
         first = [v.split()[1:] for v in first]
         if classstart != 0:
             first.insert(0, None)
-        i += n1 - classstart
 
-        second = data[i : i + n2 - 1]
+        second = itertools.islice(data, n2 - 1)
         second = [v.split()[1:] for v in second]
         second.insert(0, None)
-        i += n2 - 1
 
-        kerns = data[i]
-        kerns = DEVICETABLE_RE.split(kerns)
-        kerns = [int(k) for k in kerns if k]
+        # Most class pairs have no kerning, so only the non-zero cells are
+        # kept, as (first class, second class, kern) in row-major order.
+        kerns = []
+        values = [k for k in DEVICETABLE_RE.split(next(data)) if k]
+        for idx, kern in enumerate(values):
+            if kern != "0":
+                kern = int(kern)
+                if kern:
+                    kerns.append(divmod(idx, len(second)) + (kern,))
 
         self._kernClasses[name] = (first, second, kerns)
 
-        return i + 1
-
-    def _parseMarkClasses(self, data, i, count):
+    def _parseMarkClasses(self, data):
         classes = []
-        for line in data[i : i + count]:
+        for line in data:
             m = MARKCLASS_RE.match(line)
             name, _, glyphs = m.groups()
             name = SFDReadUTF7(name)
             classes.append((name, glyphs))
-        return i + count, classes
+        return classes
 
     def _parseAnchorClass(self, data):
         assert not self._anchorClasses
@@ -542,8 +734,19 @@ class SFDParser:
                 self._glyphAnchors[glyph.name] = {}
             if name not in self._glyphAnchors[glyph.name]:
                 self._glyphAnchors[glyph.name][name] = {}
+                if name not in self._anchorClassGlyphs:
+                    self._anchorClassGlyphs[name] = []
+                self._anchorClassGlyphs[name].append(glyph.name)
             self._glyphAnchors[glyph.name][name][kind] = (x, y, index)
 
+    def _addGlyphAnchors(self, name, anchors):
+        """Add the anchors of a glyph parsed elsewhere."""
+        self._glyphAnchors[name] = anchors
+        for anchorClass in anchors:
+            if anchorClass not in self._anchorClassGlyphs:
+                self._anchorClassGlyphs[anchorClass] = []
+            self._anchorClassGlyphs[anchorClass].append(name)
+
     def _parsePosSub(self, glyph, key, data):
         m = POSSUB_RE.match(data)
         assert m
@@ -573,14 +776,25 @@ class SFDParser:
             if subtable not in self._glyphPosSub[glyph.name]:
                 self._glyphPosSub[glyph.name][subtable] = []
             self._glyphPosSub[glyph.name][subtable].append((key, possub))
+            if subtable not in self._subtablePosSub:
+                self._subtablePosSub[subtable] = []
+            self._subtablePosSub[subtable].append((glyph.name, key, possub))
         else:
             assert False, (key, possub)
 
+    def _addGlyphPosSub(self, name, posSub):
+        """Add the substitutions and positionings of a glyph parsed elsewhere."""
+        self._glyphPosSub[name] = posSub
+        for subtable, entries in posSub.items():
+            if subtable not in self._subtablePosSub:
+                self._subtablePosSub[subtable] = []
+            for key, possub in entries:
+                self._subtablePosSub[subtable].append((name, key, possub))
+
     _CHAIN_POSSUB_KINDS = {"ContextPos2": "pos", "ChainSub2": "sub"}
 
-    def _parseChainPosSub(self, lkey, data):
-        possub = [l.strip() for l in data]
-        m = CHAIN_POSSUB_RE.match(possub[0])
+    def _parseChainPosSub(self, lkey, value, data):
+        m = CHAIN_POSSUB_RE.match(value)
         assert m
         kind, subtable, _, _, _, nRules = m.groups()
         nRules = int(nRules)
@@ -592,7 +806,8 @@ class SFDParser:
             back = []
             ahead = []
             lookups = {}
-            for line in possub[1:]:
+            for line in data:
+                line = line.strip()
                 if ":" not in line:
                     continue
                 key, value = line.split(": ", 1)
@@ -628,138 +843,185 @@ class SFDParser:
         "component",
     ]
 
-    def _parseChar(self, data):
-        _, name = data.pop(0).split(": ")
+    _CHAR_SECTIONS = {
+        "SplineSet": "EndSplineSet",
+        "Image": "EndImage",
+        "Image2": "EndImage2",
+    }
+
+    def _charWidth(self, char, key, value, section):
+        char.glyph.width = int(value)
+
+    def _charVWidth(self, char, key, value, section):
+        char.glyph.height = int(value)
+
+    def _charEncoding(self, char, key, value, section):
+        enc, uni, char.order = [int(v) for v in value.split()]
+        if uni >= 0:
+            char.unicodes.append(uni)
+
+    def _charAltUni(self, char, key, value, section):
+        altuni = [int(v, 16) for v in value.split(".")]
+        altuni = _splitList(altuni, 3)
+        char.unicodes += self._parseAltuni(char.name, altuni)
+
+    def _charGlyphClass(self, char, key, value, section):
+        self._font.lib[CATEGORIES_KEY][char.name] = self._CATEGORIES[int(value)]
+
+    def _charUnlinkRmOvrlpSave(self, char, key, value, section):
+        char.glyph.lib[DECOMPOSEREMOVEOVERLAP_KEY] = bool(int(value))
+
+    def _charAnchorPoint(self, char, key, value, section):
+        self._parseAnchorPoint(char.glyph, value)
+
+    def _charLayer(self, char, key, value, section):
+        layerIdx = value and int(value) or self._LAYER_KEYWORDS.index(key)
+        if self._minimal and layerIdx != 1:
+            char.layerIdx = None
+            return
+        char.layerIdx = layerIdx
+        layer = self._layers[layerIdx]
+        if char.name not in layer:
+            layer.newGlyph(char.name).width = char.glyph.width
+
+    def _charSplineSet(self, char, key, value, section):
+        if char.layerIdx is not None:
+            splineSet = _decodeSplineSet(section)
+            self._drawContours(char.name, char.layerIdx, splineSet)
+
+    def _charImage(self, char, key, value, section):
+        if not self._minimal:
+            image = itertools.chain([value], section)
+            glyph = self._layers[char.layerIdx][char.name]
+            if key == "Image":
+                self._parseImage(glyph, image)
+            else:
+                self._parseImage2(glyph, image)
+
+    def _charRefer(self, char, key, value, section):
+        # Just collect the refs here, we can’t insert them until all the glyphs
+        # are parsed since FontForge uses glyph indices not names. The calling
+        # code will process the references at the end.
+        if char.layerIdx is not None:
+            refs = self._glyphRefs.setdefault((char.name, char.layerIdx), [])
+            refs.append(value)
+
+    def _charKerns(self, char, key, value, section):
+        self._parseKerns(char.name, value)
+
+    def _charLCarets(self, char, key, value, section):
+        v = [int(v) for v in value.split(" ")]
+        num = v.pop(0)
+        assert len(v) == num
+        if any(v):
+            self._ligatureCarets[char.name] = v
+            if self._use_ufo_anchors:
+                for idx, x in enumerate(v):
+                    anchor = dict(name=f"caret_{idx+1}", x=x, y=0)
+                    char.glyph.appendAnchor(anchor)
+
+    def _charPosSub(self, char, key, value, section):
+        self._parsePosSub(char.glyph, key, value)
+
+    def _charMath(self, char, key, value, section):
+        lib = char.glyph.lib
+        if MATH_KEY not in lib:
+            lib[MATH_KEY] = {}
+        if key in ("GlyphVariantsVertical", "GlyphVariantsHorizontal"):
+            value = value.split(" ")
+        elif key in ("GlyphCompositionVertical", "GlyphCompositionHorizontal"):
+            value = value.split(" ")[1:]
+            value = [c.split("%") for c in value if c]
+        else:
+            value = int(value)
+        lib[MATH_KEY][key] = value
+
+    def _charComment(self, char, key, value, section):
+        if not self._minimal:
+            char.glyph.note = SFDReadUTF7(value)
+
+    def _charColour(self, char, key, value, section):
+        if not self._minimal:
+            char.glyph.markColor = _parseColor(int(value, 16))
+
+    # Glyph record keywords and the methods handling them, subclasses can
+    # extend this to handle more keywords.
+    _CHAR_HANDLERS = {
+        "Width": _charWidth,
+        "VWidth": _charVWidth,
+        "Encoding": _charEncoding,
+        "AltUni2": _charAltUni,
+        "GlyphClass": _charGlyphClass,
+        "UnlinkRmOvrlpSave": _charUnlinkRmOvrlpSave,
+        "AnchorPoint": _charAnchorPoint,
+        "Back": _charLayer,
+        "Fore": _charLayer,
+        "Layer": _charLayer,
+        "SplineSet": _charSplineSet,
+        "Image": _charImage,
+        "Image2": _charImage,
+        "Refer": _charRefer,
+        "Kerns2": _charKerns,
+        "LCarets2": _charLCarets,
+        "Position2": _charPosSub,
+        "PairPos2": _charPosSub,
+        "Ligature2": _charPosSub,
+        "Substitution2": _charPosSub,
+        "AlternateSubs2": _charPosSub,
+        "MultipleSubs2": _charPosSub,
+        "ItalicCorrection": _charMath,
+        "TopAccentHorizontal": _charMath,
+        "IsExtendedShape": _charMath,
+        "GlyphVariantsVertical": _charMath,
+        "GlyphVariantsHorizontal": _charMath,
+        "GlyphCompositionVertical": _charMath,
+        "GlyphCompositionHorizontal": _charMath,
+        "Comment": _charComment,
+        "Colour": _charColour,
+    }
+
+    # Glyph record keywords that are knowingly skipped.
+    _CHAR_IGNORED = {
+        "HStem",  # XXX
+        "VStem",  # XXX
+        "DStem2",  # XXX
+        "CounterMasks",  # XXX
+        "Flags",  # XXX
+        "LayerCount",  # XXX
+    }
+
+    def _parseChar(self, name, data):
         if name.startswith('"'):
             name = SFDReadUTF7(name)
 
-        font = self._font
-        glyph = font.newGlyph(name)
-        layerIdx = None
-        unicodes = []
+        char = _Char(name, self._font.newGlyph(name))
 
-        i = 0
-        while i < len(data):
-            line = data[i]
-            i += 1
+        handlers = self._CHAR_HANDLERS
+        for key, value, section in _tokenize(data, self._CHAR_SECTIONS, _charKeyValue):
+            handler = handlers.get(key)
+            if handler is not None:
+                handler(self, char, key, value, section)
+            elif key not in self._CHAR_IGNORED:
+                self._unknownKey(key, value)
 
-            if ": " in line:
-                key, value = line.split(": ", 1)
-            else:
-                key = line
-                value = None
-
-            if key == "Width":
-                glyph.width = int(value)
-            elif key == "VWidth":
-                glyph.height = int(value)
-            elif key == "Encoding":
-                enc, uni, order = [int(v) for v in value.split()]
-                if uni >= 0:
-                    unicodes.append(uni)
-            elif key == "AltUni2":
-                altuni = [int(v, 16) for v in value.split(".")]
-                altuni = _splitList(altuni, 3)
-                unicodes += self._parseAltuni(name, altuni)
-            elif key == "GlyphClass":
-                font.lib[CATEGORIES_KEY][name] = self._CATEGORIES[int(value)]
-            elif key == "UnlinkRmOvrlpSave":
-                glyph.lib[DECOMPOSEREMOVEOVERLAP_KEY] = bool(int(value))
-            elif key == "AnchorPoint":
-                self._parseAnchorPoint(glyph, value)
-            elif key in self._LAYER_KEYWORDS:
-                layerIdx = value and int(value) or self._LAYER_KEYWORDS.index(key)
-                if self._minimal and layerIdx != 1:
-                    layerIdx = None
-                    continue
-                layer = self._layers[layerIdx]
-                if glyph.name not in layer:
-                    layer.newGlyph(name).width = glyph.width
-            elif key == "SplineSet":
-                splines, i = self._getSection(data, i, "EndSplineSet")
-                if layerIdx is not None:
-                    contours = self._parseSplineSet(splines)
-                    self._drawContours(name, layerIdx, contours)
-            elif key == "Image":
-                image, i = self._getSection(data, i, "EndImage", value)
-                if not self._minimal:
-                    self._parseImage(self._layers[layerIdx][name], image)
-            elif key == "Image2":
-                image, i = self._getSection(data, i, "EndImage2", value)
-                if not self._minimal:
-                    self._parseImage2(self._layers[layerIdx][name], image)
-            elif key == "Refer":
-                # Just collect the refs here, we can’t insert them until all the
-                # glyphs are parsed since FontForge uses glyph indices not names.
-                # The calling code will process the references at the end.
-                if layerIdx is None:
-                    continue
-                self._glyphRefs.setdefault((name, layerIdx), []).append(value)
-            elif key == "Kerns2":
-                self._parseKerns(glyph, value)
-            elif key == "LCarets2":
-                v = [int(v) for v in value.split(" ")]
-                num = v.pop(0)
-                assert len(v) == num
-                if any(v):
-                    self._ligatureCarets[glyph.name] = v
-                    if self._use_ufo_anchors:
-                        for idx, x in enumerate(v):
-                            anchor = dict(name=f"caret_{idx+1}", x=x, y=0)
-                            glyph.appendAnchor(anchor)
-            elif key in (
-                "Position2",
-                "PairPos2",
-                "Ligature2",
-                "Substitution2",
-                "AlternateSubs2",
-                "MultipleSubs2",
-            ):
-                self._parsePosSub(glyph, key, value)
-            elif key in ("ItalicCorrection", "TopAccentHorizontal", "IsExtendedShape"):
-                if MATH_KEY not in glyph.lib:
-                    glyph.lib[MATH_KEY] = {}
-                glyph.lib[MATH_KEY][key] = int(value)
-            elif key in ("GlyphVariantsVertical", "GlyphVariantsHorizontal"):
-                if MATH_KEY not in glyph.lib:
-                    glyph.lib[MATH_KEY] = {}
-                glyph.lib[MATH_KEY][key] = value.split(" ")
-            elif key in ("GlyphCompositionVertical", "GlyphCompositionHorizontal"):
-                if MATH_KEY not in glyph.lib:
-                    glyph.lib[MATH_KEY] = {}
-                value = value.split(" ")[1:]
-                value = [c.split("%") for c in value if c]
-                glyph.lib[MATH_KEY][key] = value
-            elif key in ("HStem", "VStem", "DStem2", "CounterMasks"):
-                pass  # XXX
-            elif key == "Flags":
-                pass  # XXX
-            elif key == "LayerCount":
-                pass  # XXX
-            elif not self._minimal:
-                if key == "Comment":
-                    glyph.note = SFDReadUTF7(value)
-                elif key == "Colour":
-                    glyph.markColor = _parseColor(int(value, 16))
-
-        #   elif value is not None:
-        #      print(key, value)
-
-        glyph.unicodes = unicodes
-
-        return glyph, order
+        char.glyph.unicodes = char.unicodes
+
+        return char.glyph, char.order
 
     def _processReferences(self):
         for (name, layerIdx), refs in self._glyphRefs.items():
-            glyph = self._layers[layerIdx][name]
-            pen = glyph.getPointPen()
+            self._addReferences(name, layerIdx, refs)
+
+    def _addReferences(self, name, layerIdx, refs):
+        glyph = self._layers[layerIdx][name]
+        pen = glyph.getPointPen()
 
-            refs.reverse()
-            for ref in refs:
-                ref = ref.split()
-                base = self._glyphOrder[int(ref[0])]
-                matrix = [float(v) for v in ref[3:9]]
-                pen.addComponent(base, matrix)
+        refs.reverse()
+        for ref in refs:
+            ref = ref.split()
+            base = self._glyphOrder[int(ref[0])]
+            matrix = [float(v) for v in ref[3:9]]
+            pen.addComponent(base, matrix)
 
     def _processUFOKerning(self):
         if not self._use_ufo_kerning:
@@ -768,7 +1030,7 @@ class SFDParser:
         for subtable in self._kernPairs:
             for name1 in self._kernPairs[subtable]:
                 for gid2, kern in self._kernPairs[subtable][name1]:
-                    name2 = self._font.glyphOrder[gid2]
+                    name2 = self._glyphOrder[gid2]
                     self._font.kerning[name1, name2] = kern
 
         subtables = []
@@ -796,32 +1058,88 @@ class SFDParser:
                     if anchor.name.startswith(("exit.", "entry.")):
                         anchor.name = anchor.name.split(".")[0]
 
-    def _parseChars(self, data):
-        font = self._font
-        glyphOrderMap = {}
-
-        font.lib[CATEGORIES_KEY] = {}
+    _CHARS_SECTIONS = {"StartChar": "EndChar"}
 
-        data = [l.strip() for l in data if l.strip()]
+    def _parseGlyphs(self, records):
+        glyphOrderMap = {}
+        for data in records:
+            data = _strippedLines(data)
+            sections = self._CHARS_SECTIONS
+            for key, value, section in _tokenize(data, sections, _charKeyValue):
+                if key == "StartChar":
+                    glyph, order = self._parseChar(value, section)
+                    glyphOrderMap[glyph.name] = order
+                    self._glyphParsed(glyph.name)
+        return glyphOrderMap
+
+    def _glyphParsed(self, name):
+        """Called once a glyph is parsed, and added to all its layers."""
+        pass
+
+    def _parseChars(self, records):
+        self._font.lib[CATEGORIES_KEY] = {}
+        glyphOrderMap = self._parseGlyphs(records)
+        self._setGlyphOrder(glyphOrderMap)
+
+    def _parseCharsParallel(self, count):
+        from concurrent.futures import ProcessPoolExecutor
 
-        i = 0
-        while i < len(data):
-            line = data[i]
-            i += 1
+        font = self._font
+        lib = font.lib
+        glyphOrderMap = {}
 
-            if line.startswith("StartChar"):
-                char, i = self._getSection(data, i, "EndChar", line)
-                glyph, order = self._parseChar(char)
-                glyphOrderMap[glyph.name] = order
+        lib[CATEGORIES_KEY] = {}
+
+        # A few chunks per worker to even out the load. Results are merged in
+        # file order, so the tables end up exactly as a serial parse leaves
+        # them.
+        size = max(1, -(-count // (self._jobs * 4)))
+        options = (self._use_ufo_anchors, self._use_ufo_kerning, self._minimal)
+        chunks = [
+            (type(self), self._path, options, start, min(start + size, count))
+            for start in range(0, count, size)
+        ]
+
+        with ProcessPoolExecutor(self._jobs) as executor:
+            for result in executor.map(_parseCharRecords, chunks):
+                orders, layers, categories, uvs, *tables = result
+                glyphRefs, glyphAnchors, glyphPosSub, kernPairs, carets = tables
+
+                glyphOrderMap.update(orders)
+                for idx, glyphs in layers.items():
+                    layer = self._layers[idx]
+                    for glyph in glyphs:
+                        layer.insertGlyph(glyph, overwrite=False, copy=False)
+
+                lib[CATEGORIES_KEY].update(categories)
+                for vs, names in uvs.items():
+                    lib.setdefault(UVS_KEY, {}).setdefault(vs, {}).update(names)
+
+                self._glyphRefs.update(glyphRefs)
+                for name, anchors in glyphAnchors.items():
+                    self._addGlyphAnchors(name, anchors)
+                for name, posSub in glyphPosSub.items():
+                    self._addGlyphPosSub(name, posSub)
+                for subtable, pairs in kernPairs.items():
+                    self._kernPairs.setdefault(subtable, {}).update(pairs)
+                self._ligatureCarets.update(carets)
+
+                for name in orders:
+                    self._glyphParsed(name)
+
+        self._setGlyphOrder(glyphOrderMap)
+
+    def _setGlyphOrder(self, glyphOrderMap, unicodes=None):
+        font = self._font
 
         # We need two glyph orders, the internal one to resolve references as
         # they indexes not names, and the output glyph order that FontForge
         # uses when writing out fonts.
         assert len(font) == len(glyphOrderMap)
-        self._glyphOrder = font.glyphOrder = sorted(
-            glyphOrderMap, key=glyphOrderMap.get
-        )
-        font.glyphOrder = _sortGlyphs(font)
+        self._glyphOrder = GlyphOrder(glyphOrderMap)
+        if unicodes is None:
+            unicodes = {glyph.name: glyph.unicode for glyph in font}
+        font.glyphOrder = self._glyphOrder.sort(unicodes)
 
     _LOOKUP_TYPES = {
         0x001: "gsub_single",
@@ -867,8 +1185,13 @@ class SFDParser:
         features = []
         for tag, langsys in FEATURE_RE.findall(feature):
             features.append([tag])
+            scripts = self._featureLookups.setdefault(tag, {})
             for script, langs in LANGSYS_RE.findall(langsys):
-                features[-1].append((script, TAG_RE.findall(langs)))
+                languages = TAG_RE.findall(langs)
+                features[-1].append((script, languages))
+                for language in languages:
+                    scripts.setdefault(script, {}).setdefault(language, [])
+                    scripts[script][language].append(lookup)
 
         self._lookupInfo[lookup] = (self._LOOKUP_TYPES[kind], flag, features)
 
@@ -881,11 +1204,21 @@ class SFDParser:
         "OS2WinDOffset": "openTypeOS2WinDescent",
     }
 
+    def _fontBounds(self):
+        if not self._compact:
+            return self._font.controlPointBounds
+
+        store = self._outlines[1]
+        bounds = None
+        for name in self._font.keys():
+            bounds = unionBounds(bounds, store.controlBounds(name))
+        return bounds
+
     def _fixOffsetMetrics(self, metrics):
         if not metrics:
             return
         info = self._font.info
-        bounds = self._font.controlPointBounds
+        bounds = self._fontBounds()
         for metric in metrics:
             value = getattr(info, metric)
 
@@ -904,11 +1237,10 @@ class SFDParser:
 
             setattr(info, metric, int(round(value)))
 
-    def _writeGDEF(self):
-        font = self._font
-        categories = font.lib[CATEGORIES_KEY]
-        for name in font.glyphOrder:
-            glyph = font[name]
+    def _glyphCategories(self):
+        """Return the GDEF categories of the glyphs, guessing missing ones."""
+        categories = self._font.lib[CATEGORIES_KEY]
+        for name in self._glyphOrder.output:
             category = categories.get(name)
             if category == "unassigned":
                 continue
@@ -923,6 +1255,13 @@ class SFDParser:
                                 category = "ligature"
                                 break
                 categories[name] = category
+        return categories
+
+    def _writeGDEF(self):
+        font = self._font
+        categories = self._glyphCategories()
+        if self.featureFile is not None:
+            return self._buildGDEF(categories)
 
         lines = []
         for category in ["base", "mark", "ligature", "component"]:
@@ -947,6 +1286,32 @@ class SFDParser:
             font.features.text = "\n"
         font.features.text += "\n".join(lines)
 
+    def _buildGDEF(self, categories):
+        statements = self.featureFile.statements
+        classes = {}
+        for category in ["base", "mark", "ligature", "component"]:
+            glyphs = sorted(k for k, v in categories.items() if v == category)
+            definition = ast.GlyphClassDefinition(
+                f"GDEF_{category}", ast.GlyphClass(glyphs)
+            )
+            statements.append(definition)
+            classes[category] = ast.GlyphClassName(definition)
+
+        table = ast.TableBlock("GDEF")
+        table.statements.append(
+            ast.GlyphClassDefStatement(
+                classes["base"],
+                classes["mark"],
+                classes["ligature"],
+                classes["component"],
+            )
+        )
+        for k, v in self._ligatureCarets.items():
+            table.statements.append(
+                ast.LigatureCaretByPosStatement(ast.GlyphName(k), v)
+            )
+        statements.append(table)
+
     _SHORT_LOOKUP_TYPES = {
         "gsub_single": "single",
         "gsub_multiple": "mult",
@@ -983,7 +1348,7 @@ class SFDParser:
                 out += ch
         out = out[:63]
 
-        if out not in self._sanitizedLookupNames.values():
+        if out not in self._usedLookupNames:
             self._sanitizedLookupNames[lookup] = out
         else:
             kind, _, fealangsys = self._lookupInfo[lookup]
@@ -995,15 +1360,18 @@ class SFDParser:
                 for langsys in fealangsys[0]:
                     if langsys[0] != "DFLT":
                         script = langsys[0]
-            i = 0
-            while True:
-                out = f"{isgpos and 'pos' or 'sub'}_{kind}_{feat}{script}_{i}"
-                if out not in self._sanitizedLookupNames.values():
-                    self._sanitizedLookupNames[lookup] = out
-                    break
+            # Names are never released, so suffixes tried before for the same
+            # prefix are still taken.
+            prefix = f"{isgpos and 'pos' or 'sub'}_{kind}_{feat}{script}"
+            i = self._lookupNameSuffixes.get(prefix, 0)
+            while f"{prefix}_{i}" in self._usedLookupNames:
                 i += 2
+            self._lookupNameSuffixes[prefix] = i + 2
+            out = f"{prefix}_{i}"
+            self._sanitizedLookupNames[lookup] = out
 
-        return self._sanitizedLookupNames[lookup]
+        self._usedLookupNames.add(out)
+        return out
 
     def _sanitizeName(self, name):
         out = ""
@@ -1020,7 +1388,7 @@ class SFDParser:
     def _pruneSubtables(self, subtables, isgpos):
         out = []
         for sub in subtables:
-            if any(sub in self._glyphPosSub[g] for g in self._glyphPosSub):
+            if sub in self._subtablePosSub:
                 out.append(sub)
             elif sub in self._chainPosSub:
                 out.append(sub)
@@ -1034,45 +1402,53 @@ class SFDParser:
 
         return out
 
-    def _writeAnchorClass(self, lookup, subtable):
-        lines = []
-
+    def _anchorClassRecords(self, lookup, subtable):
+        """Return the cursive, mark and base records of an anchor subtable."""
         kind, _, _ = self._lookupInfo[lookup]
 
+        cursives = []
         bases = []
         marks = []
+        positions = self._glyphOrder.positions
         for anchorClass in self._anchorClasses[subtable]:
-            for glyph in self._font.glyphOrder:
-                if (
-                    glyph in self._glyphAnchors
-                    and anchorClass in self._glyphAnchors[glyph]
-                ):
-                    anchor = self._glyphAnchors[glyph][anchorClass]
-                    if kind == "gpos_cursive":
-                        entry = anchor.get("entry")
-                        exit = anchor.get("exit")
-                        if entry or exit:
-                            entry = _dumpAnchor(entry)
-                            exit = _dumpAnchor(exit)
-                            lines.append(f"    pos cursive {glyph} {entry} {exit};")
-                    else:
-                        mark = anchor.get("mark")
-                        base = anchor.get("basechar", anchor.get("basemark"))
-                        if mark:
-                            marks.append((glyph, mark[:2], anchorClass))
-                        if base:
-                            bases.append((glyph, base[:2], anchorClass))
+            glyphs = self._anchorClassGlyphs.get(anchorClass, [])
+            for glyph in sorted(glyphs, key=positions.get):
+                anchor = self._glyphAnchors[glyph][anchorClass]
+                if kind == "gpos_cursive":
+                    entry = anchor.get("entry")
+                    exit = anchor.get("exit")
+                    if entry or exit:
+                        cursives.append((glyph, entry, exit))
+                else:
+                    mark = anchor.get("mark")
+                    base = anchor.get("basechar", anchor.get("basemark"))
+                    if mark:
+                        marks.append((glyph, mark[:2], anchorClass))
+                    if base:
+                        bases.append((glyph, base[:2], anchorClass))
+
+        # Base anchors without a corresponding mark, nothing to do with them.
+        markClasses = {m[2] for m in marks}
+        bases = [b for b in bases if b[2] in markClasses]
+        return cursives, marks, bases
+
+    def _writeAnchorClass(self, lookup, subtable):
+        lines = []
+
+        kind, _, _ = self._lookupInfo[lookup]
+        cursives, marks, bases = self._anchorClassRecords(lookup, subtable)
+
+        for glyph, entry, exit in cursives:
+            entry = _dumpAnchor(entry)
+            exit = _dumpAnchor(exit)
+            lines.append(f"    pos cursive {glyph} {entry} {exit};")
 
         for glyph, anchor, anchorClass in marks:
             anchor = _dumpAnchor(anchor)
             className = self._sanitizeName(anchorClass)
             lines.append(f"  markClass {glyph} {anchor} @{className};")
 
-        markClasses = [m[2] for m in marks]
         for glyph, anchor, anchorClass in bases:
-            if anchorClass not in markClasses:
-                # Base anchor without a corresponding mark, nothing to do here.
-                continue
             anchor = _dumpAnchor(anchor)
             className = self._sanitizeName(anchorClass)
             pos = kind.split("2")[1]
@@ -1096,18 +1472,16 @@ class SFDParser:
                 glyphs = " ".join(group)
                 lines.append(f"    @kc{i}_second_{j} = [{glyphs}];")
 
-        for j, group1 in enumerate(groups1):
-            for k, group2 in enumerate(groups2):
-                kern = kerns[(j * len(groups2)) + k]
-                if group1 and group2 and kern != 0:
-                    lines.append(f"    pos @kc{i}_first_{j} @kc{i}_second_{k} {kern};")
+        for j, k, kern in kerns:
+            if groups1[j] and groups2[k]:
+                lines.append(f"    pos @kc{i}_first_{j} @kc{i}_second_{k} {kern};")
         return lines
 
     def _writeKernPairs(self, subtable):
         lines = []
         for name1 in self._kernPairs[subtable]:
             for gid2, kern in self._kernPairs[subtable][name1]:
-                name2 = self._font.glyphOrder[gid2]
+                name2 = self._glyphOrder[gid2]
                 lines.append(f"    pos {name1} {name2} {kern};")
         return lines
 
@@ -1136,10 +1510,11 @@ class SFDParser:
         8: "IgnoreMarks",
     }
 
-    def _writeGSUBGPOS(self, isgpos=False):
-        # Ugly as hell, rewrite later.
-        font = self._font
+    def _tableLookups(self, isgpos):
+        """Return the non-empty lookups of GSUB or GPOS, and their features.
 
+        Features map scripts to languages to sanitized lookup names.
+        """
         if isgpos:
             tableLookups = self._gposLookups
         else:
@@ -1154,53 +1529,62 @@ class SFDParser:
             if any(self._pruneSubtables(subtables, isgpos)):
                 lookups[lookup] = subtables
 
-        if not lookups:
-            return
-
-        featureSet = []
-        scriptSet = set()
-        langSet = {}
+        featureSet = {}
         for lookup in lookups:
             _, _, fealangsys = self._lookupInfo[lookup]
             for feature in fealangsys:
-                if feature[0] not in featureSet:
-                    featureSet.append(feature[0])
-                for script, languages in feature[1:]:
-                    scriptSet.add(script)
-                    if script not in langSet:
-                        langSet[script] = set()
-                    langSet[script].update(languages)
-
-        scriptSet = sorted(scriptSet)
-        langSet = {
-            s: sorted(langSet[s], key=lambda l: l == "dflt" and "0" or l)
-            for s in langSet
-        }
+                featureSet[feature[0]] = None
 
+        # The lookups of each feature, script and language were collected in
+        # lookup order by _parseLookup, only the ones of this table that
+        # survived pruning are kept.
         features = {}
         for feature in featureSet:
             outf = {}
-            for script in scriptSet:
+            scripts = self._featureLookups[feature]
+            for script in sorted(scripts):
                 outs = {}
-                for language in langSet[script]:
-                    outl = []
-                    for lookup in lookups:
-                        _, _, fealangsys = self._lookupInfo[lookup]
-                        for fl in fealangsys:
-                            if feature == fl[0]:
-                                for sl in fl[1:]:
-                                    if script == sl[0]:
-                                        for ll in sl[1]:
-                                            if language == ll:
-                                                outl.append(
-                                                    self._santizeLookupName(lookup)
-                                                )
+                languages = scripts[script]
+                for language in sorted(
+                    languages, key=lambda l: l == "dflt" and "0" or l
+                ):
+                    outl = [
+                        self._santizeLookupName(lookup)
+                        for lookup in languages[language]
+                        if lookup in lookups
+                    ]
                     if outl:
                         outs[language] = outl
                 if outs:
                     outf[script] = outs
             if outf:
                 features[feature] = outf
+        return lookups, features
+
+    def _lookupFlags(self, flag):
+        """Split a lookup flag into its boolean flags and mark class names."""
+        markAttach = markSet = None
+        if flag & 0xFF00:
+            markclass = (flag >> 8) & 0xFF
+            if markclass < len(self._markAttachClasses):
+                markAttach = self._markAttachClasses[markclass - 1][0]
+
+        if flag & 0x10:
+            markset = (flag >> 16) & 0xFFFF
+            if markset < len(self._markAttachSets):
+                markSet = self._markAttachSets[markset][0]
+
+        return flag & sum(self._LOOKUP_FLAGS), markAttach, markSet
+
+    def _writeGSUBGPOS(self, isgpos=False):
+        # Ugly as hell, rewrite later.
+        font = self._font
+
+        lookups, features = self._tableLookups(isgpos)
+        if not lookups:
+            return
+        if self.featureFile is not None:
+            return self._buildGSUBGPOS(lookups, features)
 
         lines = []
         for name, glyphs in self._markAttachSets + self._markAttachClasses:
@@ -1225,50 +1609,39 @@ class SFDParser:
                 if subtable in self._chainPosSub:
                     body += self._writeChainPosSub(subtable)
                     continue
-                for glyph in self._glyphPosSub:
-                    if subtable in self._glyphPosSub[glyph]:
-                        for _, possub in self._glyphPosSub[glyph][subtable]:
-                            if kind.startswith("gsub_"):
-                                possub = " ".join(possub)
-
-                            if kind in ("gsub_single", "gsub_multiple"):
-                                body.append(f"    sub {glyph} by {possub};")
-                            elif kind == "gsub_alternate":
-                                body.append(f"    sub {glyph} from [{possub}];")
-                            elif kind == "gsub_ligature":
-                                body.append(f"    sub {possub} by {glyph};")
-                            elif kind == "gpos_single":
-                                possub = " ".join([str(v) for v in possub])
-                                body.append(f"    pos {glyph} <{possub}>;")
-                            elif kind == "gpos_pair":
-                                glyph2 = possub.pop(0)
-                                pos1 = " ".join([str(v) for v in possub[:4]])
-                                pos2 = " ".join([str(v) for v in possub[4:]])
-                                body.append(
-                                    f"    pos {glyph} <{pos1}> {glyph2} <{pos2}>;"
-                                )
-                            else:
-                                assert False, (kind, possub)
+                for glyph, _, possub in self._subtablePosSub.get(subtable, []):
+                    if kind.startswith("gsub_"):
+                        possub = " ".join(possub)
+
+                    if kind in ("gsub_single", "gsub_multiple"):
+                        body.append(f"    sub {glyph} by {possub};")
+                    elif kind == "gsub_alternate":
+                        body.append(f"    sub {glyph} from [{possub}];")
+                    elif kind == "gsub_ligature":
+                        body.append(f"    sub {possub} by {glyph};")
+                    elif kind == "gpos_single":
+                        possub = " ".join([str(v) for v in possub])
+                        body.append(f"    pos {glyph} <{possub}>;")
+                    elif kind == "gpos_pair":
+                        glyph2 = possub[0]
+                        pos1 = " ".join([str(v) for v in possub[1:5]])
+                        pos2 = " ".join([str(v) for v in possub[5:]])
+                        body.append(f"    pos {glyph} <{pos1}> {glyph2} <{pos2}>;")
+                    else:
+                        assert False, (kind, possub)
             if not body:
                 skip.add(self._santizeLookupName(lookup))
                 continue
 
+            value, markAttach, markSet = self._lookupFlags(flag)
             flags = []
             for i, name in sorted(self._LOOKUP_FLAGS.items()):
-                if flag & i:
+                if value & i:
                     flags.append(name)
-
-            if flag & 0xFF00:
-                markclass = (flag >> 8) & 0xFF
-                if markclass < len(self._markAttachClasses):
-                    name = self._markAttachClasses[markclass - 1][0]
-                    flags.append(f"MarkAttachmentType @{name}")
-
-            if flag & 0x10:
-                markset = (flag >> 16) & 0xFFFF
-                if markset < len(self._markAttachSets):
-                    name = self._markAttachSets[markset][0]
-                    flags.append(f"UseMarkFilteringSet @{name}")
+            if markAttach is not None:
+                flags.append(f"MarkAttachmentType @{markAttach}")
+            if markSet is not None:
+                flags.append(f"UseMarkFilteringSet @{markSet}")
 
             lines.append(f"lookup {self._santizeLookupName(lookup)} {{")
 
@@ -1305,258 +1678,246 @@ class SFDParser:
             font.features.text = "\n"
         font.features.text += "\n".join(lines)
 
-    def parse(self):
-        isdir = os.path.isdir(self._path)
-        if isdir:
-            props = os.path.join(self._path, "font.props")
-            if os.path.isfile(props):
-                with open(props) as fd:
-                    data = fd.readlines()
+    def _feaLookup(self, name):
+        # Created on first use, chain rules can refer to lookups not built yet.
+        if name not in self._feaLookups:
+            self._feaLookups[name] = ast.LookupBlock(name)
+        return self._feaLookups[name]
+
+    def _feaGlyphClass(self, name, glyphs, statements):
+        if name not in self._feaClasses:
+            definition = ast.GlyphClassDefinition(name, ast.GlyphClass(glyphs))
+            self._feaClasses[name] = definition
+            statements.append(definition)
+        return ast.GlyphClassName(self._feaClasses[name])
+
+    def _buildAnchorClass(self, lookup, subtable):
+        statements = []
+
+        kind, _, _ = self._lookupInfo[lookup]
+        cursives, marks, bases = self._anchorClassRecords(lookup, subtable)
+
+        for glyph, entry, exit in cursives:
+            statements.append(
+                ast.CursivePosStatement(
+                    ast.GlyphName(glyph), _feaAnchor(entry), _feaAnchor(exit)
+                )
+            )
+
+        for glyph, anchor, anchorClass in marks:
+            className = self._sanitizeName(anchorClass)
+            if className not in self._feaMarkClasses:
+                self._feaMarkClasses[className] = ast.MarkClass(className)
+            markClass = self._feaMarkClasses[className]
+            definition = ast.MarkClassDefinition(
+                markClass, _feaAnchor(anchor), ast.GlyphName(glyph)
+            )
+            markClass.addDefinition(definition)
+            statements.append(definition)
+
+        for glyph, anchor, anchorClass in bases:
+            markClass = self._feaMarkClasses[self._sanitizeName(anchorClass)]
+            marks = [(_feaAnchor(anchor), markClass)]
+            if kind == "gpos_mark2base":
+                statement = ast.MarkBasePosStatement(ast.GlyphName(glyph), marks)
             else:
-                raise Exception("Not an SFD directory")
-        else:
-            with open(self._path) as fd:
-                data = fd.readlines()
+                assert kind == "gpos_mark2mark"  # XXX
+                statement = ast.MarkMarkPosStatement(ast.GlyphName(glyph), marks)
+            statements.append(statement)
 
-        font = self._font
-        info = font.info
+        return statements
 
-        charData = None
-        offsetMetrics = []
+    def _buildKernClass(self, subtable):
+        statements = []
+        groups1, groups2, kerns = self._kernClasses[subtable]
+        i = list(self._kernClasses.keys()).index(subtable)
+        first = {}
+        for j, group in enumerate(groups1):
+            if group:
+                name = f"kc{i}_first_{j}"
+                first[j] = self._feaGlyphClass(name, group, statements)
+
+        second = {}
+        for j, group in enumerate(groups2):
+            if group:
+                name = f"kc{i}_second_{j}"
+                second[j] = self._feaGlyphClass(name, group, statements)
+
+        for j, k, kern in kerns:
+            if groups1[j] and groups2[k]:
+                statements.append(
+                    ast.PairPosStatement(
+                        first[j], ast.ValueRecord(xAdvance=kern), second[k], None
+                    )
+                )
+        return statements
 
-        i = 0
-        while i < len(data):
-            line = data[i]
-            i += 1
+    def _buildKernPairs(self, subtable):
+        statements = []
+        for name1 in self._kernPairs[subtable]:
+            for gid2, kern in self._kernPairs[subtable][name1]:
+                name2 = self._glyphOrder[gid2]
+                statements.append(
+                    ast.PairPosStatement(
+                        ast.GlyphName(name1),
+                        ast.ValueRecord(xAdvance=kern),
+                        ast.GlyphName(name2),
+                        None,
+                    )
+                )
+        return statements
 
-            if ":" in line:
-                key, value = [v.strip() for v in line.split(":", 1)]
+    def _buildChainPosSub(self, subtable):
+        kind, match, back, ahead, lookups = self._chainPosSub[subtable]
+        glyphs = []
+        refs = []
+        for i, coverage in enumerate(match):
+            glyphs.append(ast.GlyphClass(coverage))
+            if i in lookups:
+                names = [self._santizeLookupName(l, kind == "pos") for l in lookups[i]]
+                refs.append([self._feaLookup(name) for name in names])
             else:
-                key = line.strip()
-                value = None
-
-            if i == 1:
-                if key != "SplineFontDB":
-                    raise Exception("Not an SFD file.")
-                version = float(value)
-                if version not in (3.0, 3.2):
-                    raise Exception(f"Unsupported SFD version: {version}")
-
-            elif key == "FontName":
-                info.postscriptFontName = value
-            elif key == "FullName":
-                info.postscriptFullName = value
-            elif key == "FamilyName":
-                info.familyName = value
-            elif key == "DefaultBaseFilename":
-                pass  # info.XXX = value
-            elif key == "Weight":
-                info.postscriptWeightName = value
-            elif key == "Copyright":
-                # Decode escape sequences.
-                info.copyright = codecs.escape_decode(value)[0].decode("utf-8")
-            elif key == "Version":
-                info.versionMajor, info.versionMinor = _parseVersion(value)
-            elif key == "ItalicAngle":
-                info.italicAngle = info.postscriptSlantAngle = float(value)
-            elif key == "UnderlinePosition":
-                info.postscriptUnderlinePosition = float(value)
-            elif key == "UnderlineWidth":
-                info.postscriptUnderlineThickness = float(value)
-            elif key in "Ascent":
-                info.ascender = int(value)
-            elif key in "Descent":
-                info.descender = -int(value)
-            elif key == "sfntRevision":
-                pass  # info.XXX = int(value, 16)
-            elif key == "WidthSeparation":
-                pass  # XXX = float(value) # auto spacing
-            elif key == "LayerCount":
-                self._layers = int(value) * [None]
-                self._layerType = int(value) * [None]
-            elif key == "Layer":
-                m = LAYER_RE.match(value)
-                idx, quadratic, name = m.groups()
-                idx = int(idx)
-                quadratic = bool(int(quadratic))
-                name = SFDReadUTF7(name)
-                if idx == 1:
-                    self._layers[idx] = font.layers.defaultLayer
-                elif not self._minimal:
-                    self._layers[idx] = name
-                self._layerType[idx] = quadratic
-            elif key == "DisplayLayer":
-                pass  # XXX default layer
-            elif key == "DisplaySize":
-                pass  # GUI
-            elif key == "AntiAlias":
-                pass  # GUI
-            elif key == "FitToEm":
-                pass  # GUI
-            elif key == "WinInfo":
-                pass  # GUI
-            elif key == "Encoding":
-                pass  # XXX encoding = value
-            elif key == "CreationTime":
-                v = datetime.utcfromtimestamp(int(value))
-                info.openTypeHeadCreated = v.strftime("%Y/%m/%d %H:%M:%S")
-            elif key == "ModificationTime":
-                pass  # XXX
-            elif key == "FSType":
-                v = int(value)
-                v = [bit for bit in range(16) if v & (1 << bit)]
-                info.openTypeOS2Type = v
-            elif key == "PfmFamily":
-                pass  # info.XXX = value
-            elif key in ("TTFWeight", "PfmWeight"):
-                info.openTypeOS2WeightClass = int(value)
-            elif key == "TTFWidth":
-                info.openTypeOS2WidthClass = int(value)
-            elif key == "Panose":
-                v = value.split()
-                info.openTypeOS2Panose = [int(n) for n in v]
-            elif key == "LineGap":
-                info.openTypeHheaLineGap = int(value)
-            elif key == "VLineGap":
-                info.openTypeVheaVertTypoLineGap = int(value)
-            elif key == "HheadAscent":
-                info.openTypeHheaAscender = int(value)
-            elif key == "HheadDescent":
-                info.openTypeHheaDescender = int(value)
-            elif key == "OS2TypoLinegap":
-                info.openTypeOS2TypoLineGap = int(value)
-            elif key == "OS2Vendor":
-                info.openTypeOS2VendorID = value.strip("'")
-            elif key == "OS2FamilyClass":
-                v = int(value)
-                info.openTypeOS2FamilyClass = (v >> 8, v & 0xFF)
-            elif key == "OS2Version":
-                pass  # XXX
-            elif key == "OS2_WeightWidthSlopeOnly":
-                if int(value):
-                    if not info.openTypeOS2Selection:
-                        info.openTypeOS2Selection = []
-                    info.openTypeOS2Selection += [8]
-            elif key == "OS2_UseTypoMetrics":
-                if not info.openTypeOS2Selection:
-                    info.openTypeOS2Selection = []
-                info.openTypeOS2Selection += [7]
-            elif key == "OS2CodePages":
-                pass  # XXX
-            elif key == "OS2UnicodeRanges":
-                pass  # XXX
-            elif key == "OS2TypoAscent":
-                info.openTypeOS2TypoAscender = int(value)
-            elif key == "OS2TypoDescent":
-                info.openTypeOS2TypoDescender = int(value)
-            elif key == "OS2WinAscent":
-                info.openTypeOS2WinAscent = int(value)
-            elif key == "OS2WinDescent":
-                info.openTypeOS2WinDescent = int(value)
-            elif key in self._OFFSET_METRICS:
-                if int(value):
-                    offsetMetrics.append(self._OFFSET_METRICS[key])
-            elif key == "OS2SubXSize":
-                info.openTypeOS2SubscriptXSize = int(value)
-            elif key == "OS2SubYSize":
-                info.openTypeOS2SubscriptYSize = int(value)
-            elif key == "OS2SubXOff":
-                info.openTypeOS2SubscriptXOffset = int(value)
-            elif key == "OS2SubYOff":
-                info.openTypeOS2SubscriptYOffset = int(value)
-            elif key == "OS2SupXSize":
-                info.openTypeOS2SuperscriptXSize = int(value)
-            elif key == "OS2SupYSize":
-                info.openTypeOS2SuperscriptYSize = int(value)
-            elif key == "OS2SupXOff":
-                info.openTypeOS2SuperscriptXOffset = int(value)
-            elif key == "OS2SupYOff":
-                info.openTypeOS2SuperscriptYOffset = int(value)
-            elif key == "OS2StrikeYSize":
-                info.openTypeOS2StrikeoutSize = int(value)
-            elif key == "OS2StrikeYPos":
-                info.openTypeOS2StrikeoutPosition = int(value)
-            elif key == "OS2CapHeight":
-                info.capHeight = int(value)
-            elif key == "OS2XHeight":
-                info.xHeight = int(value)
-            elif key == "UniqueID":
-                info.postscriptUniqueID = int(value)
-            elif key == "LangName":
-                self._parseNames(value)
-            elif key == "GaspTable":
-                self._parseGaspTable(value)
-            elif key == "BeginPrivate":
-                section, i = self._getSection(data, i, "EndPrivate", value)
-                self._parsePrivateDict(section)
-            elif key == "BeginChars":
-                charData, i = self._getSection(data, i, "EndChars")
-            elif key == "KernClass2":
-                i = self._parseKernClass(data, i, value)
-            elif key in (
-                "ContextPos2",
-                "ContextSub2",
-                "ChainPos2",
-                "ChainSub2",
-                "ReverseChain2",
-            ):
-                section, i = self._getSection(data, i, "EndFPST", value)
-                self._parseChainPosSub(key, section)
-            elif key == "Lookup":
-                self._parseLookup(value)
-            elif key == "AnchorClass2":
-                self._parseAnchorClass(value)
-            elif key == "MarkAttachClasses":
-                count = int(value) - 1
-                i, self._markAttachClasses = self._parseMarkClasses(data, i, count)
-            elif key == "MarkAttachSets":
-                count = int(value)
-                i, self._markAttachSets = self._parseMarkClasses(data, i, count)
-            elif key == "MATH":
-                if MATH_KEY not in font.lib:
-                    font.lib[MATH_KEY] = {}
-                c, v = value.split(": ")
-                # Match OT spec names.
-                if c == "FractionDenominatorDisplayStyleGapMin":
-                    c = "FractionDenomDisplayStyleGapMin"
-                elif c == "FractionNumeratorDisplayStyleGapMin":
-                    c = "FractionNumDisplayStyleGapMin"
-                font.lib[MATH_KEY][c] = int(v)
-            elif key == "XUID":
-                pass  # XXX
-            elif key == "UnicodeInterp":
-                pass  # XXX
-            elif key == "NameList":
-                pass  # XXX
-            elif key == "DEI":
-                pass
-            elif key == "EndSplineFont":
-                break
-            elif not self._minimal:
-                if key == "Comments":
-                    info.note = value
-                elif key == "UComments":
-                    old = info.note
-                    info.note = SFDReadUTF7(value)
-                    if old:
-                        info.note += "\n" + old
-                elif key == "FontLog":
-                    if not info.note:
-                        info.note = ""
-                    else:
-                        info.note = "\n"
-                    info.note += "Font log:\n" + SFDReadUTF7(value)
-                elif key == "Grid":
-                    grid, i = self._getSection(data, i, "EndSplineSet")
-                    self._parseGrid(grid)
+                refs.append(None)
+        back = [ast.GlyphClass(coverage) for coverage in back]
+        ahead = [ast.GlyphClass(coverage) for coverage in ahead]
+        if kind == "pos":
+            return ast.ChainContextPosStatement(back, glyphs, ahead, refs)
+        return ast.ChainContextSubstStatement(back, glyphs, ahead, refs)
+
+    def _buildPosSub(self, kind, glyph, possub):
+        # What feaLib parses the text _writeGSUBGPOS() writes into.
+        if kind in ("gsub_single", "gsub_multiple"):
+            if len(possub) == 1:
+                return ast.SingleSubstStatement(
+                    [ast.GlyphName(glyph)], [ast.GlyphName(possub[0])], [], [], False
+                )
+            replacement = [ast.GlyphName(g) for g in possub]
+            return ast.MultipleSubstStatement([], ast.GlyphName(glyph), [], replacement)
+        elif kind == "gsub_alternate":
+            return ast.AlternateSubstStatement(
+                [], ast.GlyphName(glyph), [], ast.GlyphClass(possub)
+            )
+        elif kind == "gsub_ligature":
+            components = [ast.GlyphName(g) for g in possub]
+            return ast.LigatureSubstStatement([], components, [], glyph, False)
+        elif kind == "gpos_single":
+            pos = [(ast.GlyphName(glyph), ast.ValueRecord(*possub))]
+            return ast.SinglePosStatement(pos, [], [], False)
+        elif kind == "gpos_pair":
+            return ast.PairPosStatement(
+                ast.GlyphName(glyph),
+                ast.ValueRecord(*possub[1:5]),
+                ast.GlyphName(possub[0]),
+                ast.ValueRecord(*possub[5:]),
+            )
+        else:
+            assert False, (kind, possub)
 
-        #   else:
-        #      print(key, value)
+    def _buildGSUBGPOS(self, lookups, features):
+        statements = self.featureFile.statements
+        for name, glyphs in self._markAttachSets + self._markAttachClasses:
+            self._feaGlyphClass(name, glyphs.split(), statements)
 
-        # FontForge does not match OpenType here.
-        if info.postscriptUnderlinePosition and info.postscriptUnderlineThickness:
-            info.postscriptUnderlinePosition += info.postscriptUnderlineThickness / 2
+        skip = set()
+        blocks = {}
+
+        for lookup in lookups:
+            kind, flag, _ = self._lookupInfo[lookup]
 
+            body = []
+            for subtable in lookups[lookup]:
+                if subtable in self._anchorClasses:
+                    body += self._buildAnchorClass(lookup, subtable)
+                elif subtable in self._kernClasses:
+                    body += self._buildKernClass(subtable)
+                elif subtable in self._kernPairs:
+                    body += self._buildKernPairs(subtable)
+                elif subtable in self._chainPosSub:
+                    body.append(self._buildChainPosSub(subtable))
+                else:
+                    for glyph, _, possub in self._subtablePosSub.get(subtable, []):
+                        body.append(self._buildPosSub(kind, glyph, possub))
+            name = self._santizeLookupName(lookup)
+            if not body:
+                skip.add(name)
+                continue
+
+            block = self._feaLookup(name)
+            value, markAttach, markSet = self._lookupFlags(flag)
+            if value or markAttach is not None or markSet is not None:
+                if markAttach is not None:
+                    markAttach = ast.GlyphClassName(self._feaClasses[markAttach])
+                if markSet is not None:
+                    markSet = ast.GlyphClassName(self._feaClasses[markSet])
+                block.statements.append(
+                    ast.LookupFlagStatement(value, markAttach, markSet)
+                )
+            block.statements += body
+            blocks[name] = block
+
+        # FontForge chain rules can apply lookups that come after them, feaLib
+        # needs them defined first, so these go before the chain lookups.
+        added = set()
+        for name in blocks:
+            self._addFeaLookup(name, blocks, added, statements)
+
+        for feature in features:
+            block = ast.FeatureBlock(_feaTag(feature))
+            used = False
+            for script in features[feature]:
+                block.statements.append(ast.ScriptStatement(_feaTag(script)))
+                for language in features[feature][script]:
+                    block.statements.append(
+                        ast.LanguageStatement(
+                            _feaTag(language), include_default=language == "dflt"
+                        )
+                    )
+                    for lookup in features[feature][script][language]:
+                        if lookup in skip:
+                            continue
+                        block.statements.append(
+                            ast.LookupReferenceStatement(self._feaLookup(lookup))
+                        )
+                        used = True
+            if used:
+                statements.append(block)
+
+    def _addFeaLookup(self, name, blocks, added, statements):
+        """Add a lookup block to statements, after the lookups it applies."""
+        if name in added:
+            return
+        added.add(name)
+        block = blocks[name]
+        chains = (ast.ChainContextPosStatement, ast.ChainContextSubstStatement)
+        for statement in block.statements:
+            if not isinstance(statement, chains):
+                continue
+            for i, refs in enumerate(statement.lookups):
+                if refs is None:
+                    continue
+                # Lookups without rules are not built, applying them does
+                # nothing.
+                refs = [l for l in refs if l.name in blocks]
+                for ref in refs:
+                    self._addFeaLookup(ref.name, blocks, added, statements)
+                statement.lookups[i] = refs or None
+        statements.append(block)
+
+    _HEADER_SECTIONS = {
+        "BeginPrivate": "EndPrivate",
+        "BeginChars": "EndChars",
+        "KernClass2": _kernClassLineCount,
+        "ContextPos2": "EndFPST",
+        "ContextSub2": "EndFPST",
+        "ChainPos2": "EndFPST",
+        "ChainSub2": "EndFPST",
+        "ReverseChain2": "EndFPST",
+        "MarkAttachClasses": lambda value: int(value) - 1,
+        "MarkAttachSets": int,
+        "Grid": "EndSplineSet",
+    }
+
+    def _newLayers(self):
         for idx, name in enumerate(self._layers):
             if not isinstance(name, str):
                 continue
@@ -1565,36 +1926,361 @@ class SFDParser:
             if idx not in (0, 1) and self._layers.count(name) != 1:
                 # FontForge layer names are not unique, make sure ours are.
                 name += f"_{idx}"
-            self._layers[idx] = font.newLayer(name)
+            self._layers[idx] = self._newLayer(name)
+        if self._compact:
+            from .compact import OutlineStore
+
+            for idx, layer in enumerate(self._layers):
+                if layer is not None and not isinstance(layer, str):
+                    self._outlines[idx] = OutlineStore(layer)
+
+    def _newLayer(self, name):
+        return self._font.newLayer(name)
+
+    def _readGlyphFiles(self):
+        """Yield the lines of each SFDir glyph file.
+
+        Files are read ahead by a pool of threads, so that the latency of
+        opening many small files overlaps with parsing them.
+        """
+        import collections
+        import pathlib
+        from concurrent.futures import ThreadPoolExecutor
+
+        def read(filename):
+            with open(filename) as fp:
+                return fp.read()
+
+        # Same as ThreadPoolExecutor default, this is I/O bound work.
+        workers = min(32, (os.cpu_count() or 1) + 4)
+
+        filenames = pathlib.Path(self._path).glob("*.glyph")
+        with ThreadPoolExecutor(workers) as executor:
+            # Bound the read ahead so memory use stays independent of the
+            # number of glyphs.
+            window = workers * 4
+            pending = collections.deque()
+            for filename in filenames:
+                pending.append(executor.submit(read, filename))
+                if len(pending) >= window:
+                    yield io.StringIO(pending.popleft().result())
+            while pending:
+                yield io.StringIO(pending.popleft().result())
+
+    def _phase(self, name, records=None):
+        if self._profiler is None:
+            return contextlib.nullcontext()
+        return self._profiler.phase(name, records)
+
+    def parse(self):
+        glyphCount = lambda: len(self._font)
+        if os.path.isdir(self._path):
+            props = os.path.join(self._path, "font.props")
+            if not os.path.isfile(props):
+                raise Exception("Not an SFD directory")
+            with self._phase("header", lambda: self._headerRecords):
+                with open(props) as fd:
+                    offsetMetrics = self._parseHeader(fd)
+                self._newLayers()
+            with self._phase("parseChars", glyphCount):
+                self._parseChars(self._readGlyphFiles())
+        else:
+            from .index import SFDIndex
+
+            # The index lets us parse the header on its own, without walking
+            # through the glyphs first.
+            with contextlib.ExitStack() as stack:
+                with self._phase("header", lambda: self._headerRecords):
+                    index = stack.enter_context(SFDIndex(self._path))
+                    offsetMetrics = self._parseHeader(index.headerLines())
+                    self._newLayers()
+                with self._phase("parseChars", glyphCount):
+                    if self._jobs > 1:
+                        self._parseCharsParallel(len(index))
+                    else:
+                        self._parseChars(index.records())
+
+        self._finish(offsetMetrics)
+
+    def _unknownKey(self, key, value):
+        """Called for keywords that are neither handled nor ignored."""
+        pass
+
+    def _headerLayerCount(self, key, value, section):
+        self._layers = int(value) * [None]
+        self._layerType = int(value) * [None]
+
+    def _headerLayer(self, key, value, section):
+        m = LAYER_RE.match(value)
+        idx, quadratic, name = m.groups()
+        idx = int(idx)
+        quadratic = bool(int(quadratic))
+        name = SFDReadUTF7(name)
+        if idx == 1:
+            self._layers[idx] = self._font.layers.defaultLayer
+        elif not self._minimal:
+            self._layers[idx] = name
+        self._layerType[idx] = quadratic
 
-        if isdir:
-            assert charData is None
-            import pathlib
+    def _headerItalicAngle(self, key, value, section):
+        info = self._font.info
+        info.italicAngle = info.postscriptSlantAngle = float(value)
+
+    def _headerVersion(self, key, value, section):
+        info = self._font.info
+        info.versionMajor, info.versionMinor = _parseVersion(value)
+
+    def _headerOffsetMetric(self, key, value, section):
+        if int(value):
+            self._offsetMetrics.append(self._OFFSET_METRICS[key])
+
+    def _headerOS2Selection(self, key, value, section):
+        info = self._font.info
+        if key == "OS2_WeightWidthSlopeOnly":
+            if not int(value):
+                return
+            bit = 8
+        else:
+            bit = 7
+        if not info.openTypeOS2Selection:
+            info.openTypeOS2Selection = []
+        info.openTypeOS2Selection += [bit]
+
+    def _headerNames(self, key, value, section):
+        self._parseNames(value)
+
+    def _headerGasp(self, key, value, section):
+        self._parseGaspTable(value)
+
+    def _headerLookup(self, key, value, section):
+        self._parseLookup(value)
+
+    def _headerPrivate(self, key, value, section):
+        self._parsePrivateDict(value, section)
+
+    def _headerKernClass(self, key, value, section):
+        self._parseKernClass(value, section)
+
+    def _headerChainPosSub(self, key, value, section):
+        self._parseChainPosSub(key, value, section)
+
+    def _headerAnchorClass(self, key, value, section):
+        self._parseAnchorClass(value)
+
+    def _headerMarkAttach(self, key, value, section):
+        classes = self._parseMarkClasses(section)
+        if key == "MarkAttachClasses":
+            self._markAttachClasses = classes
+        else:
+            self._markAttachSets = classes
+
+    def _headerMath(self, key, value, section):
+        lib = self._font.lib
+        if MATH_KEY not in lib:
+            lib[MATH_KEY] = {}
+        c, v = value.split(": ")
+        # Match OT spec names.
+        if c == "FractionDenominatorDisplayStyleGapMin":
+            c = "FractionDenomDisplayStyleGapMin"
+        elif c == "FractionNumeratorDisplayStyleGapMin":
+            c = "FractionNumDisplayStyleGapMin"
+        lib[MATH_KEY][c] = int(v)
+
+    def _headerComments(self, key, value, section):
+        if not self._minimal:
+            self._font.info.note = value
+
+    def _headerUComments(self, key, value, section):
+        if not self._minimal:
+            info = self._font.info
+            old = info.note
+            info.note = SFDReadUTF7(value)
+            if old:
+                info.note += "\n" + old
+
+    def _headerFontLog(self, key, value, section):
+        if not self._minimal:
+            info = self._font.info
+            if not info.note:
+                info.note = ""
+            else:
+                info.note = "\n"
+            info.note += "Font log:\n" + SFDReadUTF7(value)
+
+    def _headerGrid(self, key, value, section):
+        if not self._minimal:
+            self._parseGrid(section)
+
+    # Header keywords and the methods handling them, subclasses can extend this
+    # to handle more keywords.
+    _HEADER_HANDLERS = {
+        "FontName": _setInfo("postscriptFontName"),
+        "FullName": _setInfo("postscriptFullName"),
+        "FamilyName": _setInfo("familyName"),
+        "Weight": _setInfo("postscriptWeightName"),
+        # Decode escape sequences.
+        "Copyright": _setInfo(
+            "copyright", lambda v: codecs.escape_decode(v)[0].decode("utf-8")
+        ),
+        "Version": _headerVersion,
+        "ItalicAngle": _headerItalicAngle,
+        "UnderlinePosition": _setInfo("postscriptUnderlinePosition", float),
+        "UnderlineWidth": _setInfo("postscriptUnderlineThickness", float),
+        "Ascent": _setInfo("ascender", int),
+        "Descent": _setInfo("descender", lambda v: -int(v)),
+        "LayerCount": _headerLayerCount,
+        "Layer": _headerLayer,
+        "CreationTime": _setInfo(
+            "openTypeHeadCreated",
+            lambda v: datetime.utcfromtimestamp(int(v)).strftime("%Y/%m/%d %H:%M:%S"),
+        ),
+        "FSType": _setInfo(
+            "openTypeOS2Type",
+            lambda v: [bit for bit in range(16) if int(v) & (1 << bit)],
+        ),
+        "TTFWeight": _setInfo("openTypeOS2WeightClass", int),
+        "PfmWeight": _setInfo("openTypeOS2WeightClass", int),
+        "TTFWidth": _setInfo("openTypeOS2WidthClass", int),
+        "Panose": _setInfo("openTypeOS2Panose", lambda v: [int(n) for n in v.split()]),
+        "LineGap": _setInfo("openTypeHheaLineGap", int),
+        "VLineGap": _setInfo("openTypeVheaVertTypoLineGap", int),
+        "HheadAscent": _setInfo("openTypeHheaAscender", int),
+        "HheadDescent": _setInfo("openTypeHheaDescender", int),
+        "OS2TypoLinegap": _setInfo("openTypeOS2TypoLineGap", int),
+        "OS2Vendor": _setInfo("openTypeOS2VendorID", lambda v: v.strip("'")),
+        "OS2FamilyClass": _setInfo(
+            "openTypeOS2FamilyClass", lambda v: (int(v) >> 8, int(v) & 0xFF)
+        ),
+        "OS2_WeightWidthSlopeOnly": _headerOS2Selection,
+        "OS2_UseTypoMetrics": _headerOS2Selection,
+        "OS2TypoAscent": _setInfo("openTypeOS2TypoAscender", int),
+        "OS2TypoDescent": _setInfo("openTypeOS2TypoDescender", int),
+        "OS2WinAscent": _setInfo("openTypeOS2WinAscent", int),
+        "OS2WinDescent": _setInfo("openTypeOS2WinDescent", int),
+        **dict.fromkeys(_OFFSET_METRICS, _headerOffsetMetric),
+        "OS2SubXSize": _setInfo("openTypeOS2SubscriptXSize", int),
+        "OS2SubYSize": _setInfo("openTypeOS2SubscriptYSize", int),
+        "OS2SubXOff": _setInfo("openTypeOS2SubscriptXOffset", int),
+        "OS2SubYOff": _setInfo("openTypeOS2SubscriptYOffset", int),
+        "OS2SupXSize": _setInfo("openTypeOS2SuperscriptXSize", int),
+        "OS2SupYSize": _setInfo("openTypeOS2SuperscriptYSize", int),
+        "OS2SupXOff": _setInfo("openTypeOS2SuperscriptXOffset", int),
+        "OS2SupYOff": _setInfo("openTypeOS2SuperscriptYOffset", int),
+        "OS2StrikeYSize": _setInfo("openTypeOS2StrikeoutSize", int),
+        "OS2StrikeYPos": _setInfo("openTypeOS2StrikeoutPosition", int),
+        "OS2CapHeight": _setInfo("capHeight", int),
+        "OS2XHeight": _setInfo("xHeight", int),
+        "UniqueID": _setInfo("postscriptUniqueID", int),
+        "LangName": _headerNames,
+        "GaspTable": _headerGasp,
+        "BeginPrivate": _headerPrivate,
+        "KernClass2": _headerKernClass,
+        "ContextPos2": _headerChainPosSub,
+        "ContextSub2": _headerChainPosSub,
+        "ChainPos2": _headerChainPosSub,
+        "ChainSub2": _headerChainPosSub,
+        "ReverseChain2": _headerChainPosSub,
+        "Lookup": _headerLookup,
+        "AnchorClass2": _headerAnchorClass,
+        "MarkAttachClasses": _headerMarkAttach,
+        "MarkAttachSets": _headerMarkAttach,
+        "MATH": _headerMath,
+        "Comments": _headerComments,
+        "UComments": _headerUComments,
+        "FontLog": _headerFontLog,
+        "Grid": _headerGrid,
+    }
 
-            charData = []
-            for filename in pathlib.Path(self._path).glob("*.glyph"):
-                with open(filename) as fp:
-                    charData += fp.readlines()
+    # Header keywords that are knowingly skipped, mostly FontForge UI settings
+    # and things UFO has no place for.
+    _HEADER_IGNORED = {
+        "DefaultBaseFilename",  # info.XXX = value
+        "sfntRevision",  # info.XXX = int(value, 16)
+        "WidthSeparation",  # XXX = float(value) # auto spacing
+        "DisplayLayer",  # XXX default layer
+        "DisplaySize",  # GUI
+        "AntiAlias",  # GUI
+        "FitToEm",  # GUI
+        "WinInfo",  # GUI
+        "Encoding",  # XXX encoding = value
+        "ModificationTime",  # XXX
+        "PfmFamily",  # info.XXX = value
+        "OS2Version",  # XXX
+        "OS2CodePages",  # XXX
+        "OS2UnicodeRanges",  # XXX
+        # Glyphs are parsed separately once the header is done.
+        "BeginChars",
+        "XUID",  # XXX
+        "UnicodeInterp",  # XXX
+        "NameList",  # XXX
+        "DEI",
+    }
 
-        self._parseChars(charData)
+    def _parseHeader(self, data):
+        self._offsetMetrics = []
+
+        records = _tokenize(data, self._HEADER_SECTIONS)
+        key, value, _ = next(records, (None, None, None))
+        if key != "SplineFontDB":
+            raise Exception("Not an SFD file.")
+        version = float(value)
+        if version not in (3.0, 3.2):
+            raise Exception(f"Unsupported SFD version: {version}")
+
+        handlers = self._HEADER_HANDLERS
+        self._headerRecords = 1
+        for key, value, section in records:
+            self._headerRecords += 1
+            handler = handlers.get(key)
+            if handler is not None:
+                handler(self, key, value, section)
+            elif key == "EndSplineFont":
+                break
+            elif key not in self._HEADER_IGNORED:
+                self._unknownKey(key, value)
+
+        return self._offsetMetrics
 
+    def _finish(self, offsetMetrics):
         # We can’t insert the references while parsing the glyphs since
         # FontForge uses glyph indices so we need to know the glyph order
         # first.
-        self._processReferences()
+        refCount = lambda: sum(len(refs) for refs in self._glyphRefs.values())
+        with self._phase("processReferences", refCount):
+            self._processReferences()
 
         # Same for kerning.
-        self._processUFOKerning()
+        with self._phase("processUFOKerning", lambda: len(self._font.kerning)):
+            self._processUFOKerning()
 
         self._fixUFOAnchors()
 
         # Need to run after parsing glyphs so that we can calculate font
         # bounding box.
-        self._fixOffsetMetrics(offsetMetrics)
+        boundsCount = lambda: len(self._glyphOrder) if offsetMetrics else 0
+        with self._phase("fixOffsetMetrics", boundsCount):
+            self._fixOffsetMetrics(offsetMetrics)
+
+        with self._phase("writeGSUB", lambda: len(self._gsubLookups)):
+            self._writeGSUBGPOS(isgpos=False)
+        with self._phase("writeGPOS", lambda: len(self._gposLookups)):
+            self._writeGSUBGPOS(isgpos=True)
+        categoryCount = lambda: len(self._font.lib.get(CATEGORIES_KEY, {}))
+        with self._phase("writeGDEF", categoryCount):
+            self._writeGDEF()
+
+        self._fixFontInfo()
 
-        self._writeGSUBGPOS(isgpos=False)
-        self._writeGSUBGPOS(isgpos=True)
-        self._writeGDEF()
+        # Glyphs are turned into ufoLib2 objects from now on only when used.
+        for store in self._outlines.values():
+            store.compact()
+
+    def _fixFontInfo(self):
+        info = self._font.info
+
+        # FontForge does not match OpenType here.
+        if info.postscriptUnderlinePosition and info.postscriptUnderlineThickness:
+            info.postscriptUnderlinePosition += info.postscriptUnderlineThickness / 2
 
         # FontForge does not have an explicit UPEM setting, it is the sum of its
         # ascender and descender.
@@ -1610,3 +2296,39 @@ class SFDParser:
             elif info.postscriptWeightName:
                 value = info.postscriptWeightName
             info.styleName = value
+
+
+def _parseCharRecords(chunk):
+    """Parse a range of glyph records of an SFD file in a worker process."""
+    from ufoLib2 import Font
+    from .index import SFDIndex
+
+    cls, path, options, start, stop = chunk
+
+    # Each chunk gets a parser of its own, the header is parsed again for the
+    # layers and everything else glyphs might depend on. It is of the same
+    # class as the main one, for any keyword handlers it adds.
+    font = Font()
+    parser = cls(path, font, *options)
+    font.lib[CATEGORIES_KEY] = {}
+    with SFDIndex(path) as index:
+        parser._parseHeader(index.headerLines())
+        parser._newLayers()
+        orders = parser._parseGlyphs(index.records(start, stop))
+
+    layers = {}
+    for idx, layer in enumerate(parser._layers):
+        if layer is not None and not isinstance(layer, str):
+            layers[idx] = list(layer)
+
+    return (
+        orders,
+        layers,
+        font.lib[CATEGORIES_KEY],
+        font.lib.get(UVS_KEY, {}),
+        parser._glyphRefs,
+        parser._glyphAnchors,
+        parser._glyphPosSub,
+        parser._kernPairs,
+        parser._ligatureCarets,
+    )
@@ -0,0 +1,99 @@
+import contextlib
+import json
+import time
+
+# Names of the phases of an sfd2ufo conversion, in order.
+PHASES = (
+    "header",
+    "parseChars",
+    "processReferences",
+    "processUFOKerning",
+    "fixOffsetMetrics",
+    "writeGSUB",
+    "writeGPOS",
+    "writeGDEF",
+    "save",
+)
+
+
+class Profiler:
+    """Times the phases of a conversion.
+
+    Pass it to SFDParser to time parsing, and use phase() to time anything
+    else, like saving the font. Each phase records its wall time in seconds
+    and, when known, the number of records it processed (header records,
+    glyphs, references, lookups and so on).
+
+    If cprofile is given, as a (phase name, file name) pair, that phase also
+    runs under cProfile and its stats are dumped to the file.
+    """
+
+    def __init__(self, cprofile=None):
+        self.phases = []
+        self._cprofile = cprofile
+
+    @contextlib.contextmanager
+    def phase(self, name, records=None):
+        """Time the code run inside the context as the named phase.
+
+        records is a function returning the number of records processed,
+        called once the phase is done. The phase dict is yielded, for callers
+        to add details to, like the "stages" of a compile.
+        """
+        profile = None
+        if self._cprofile is not None and self._cprofile[0] == name:
+            import cProfile
+
+            profile = cProfile.Profile()
+
+        phase = dict(name=name, seconds=None, records=None)
+        self._phaseStart(name)
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield phase
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(self._cprofile[1])
+        phase["seconds"] = time.perf_counter() - start
+        if records is not None:
+            phase["records"] = records()
+        self._phaseDone(phase)
+        self.phases.append(phase)
+
+    def _phaseStart(self, name):
+        pass
+
+    def _phaseDone(self, phase):
+        pass
+
+    @property
+    def total(self):
+        return sum(phase["seconds"] for phase in self.phases)
+
+    def asDict(self):
+        return dict(phases=self.phases, total=self.total)
+
+    def toJSON(self):
+        return json.dumps(self.asDict(), indent=2)
+
+    def report(self):
+        """Return a table of the phases, for humans."""
+        names = [p["name"] for p in self.phases]
+        for phase in self.phases:
+            names += ["  " + s["name"] for s in phase.get("stages", [])]
+        width = max(len(name) for name in names + ["total"])
+        lines = [f"{'phase':<{width}}  {'seconds':>9}  {'records':>9}"]
+        for phase in self.phases:
+            records = phase["records"]
+            records = "" if records is None else records
+            lines.append(
+                f"{phase['name']:<{width}}  {phase['seconds']:>9.3f}  {records:>9}"
+            )
+            for stage in phase.get("stages", []):
+                name = "  " + stage["name"]
+                lines.append(f"{name:<{width}}  {stage['seconds']:>9.3f}")
+        lines.append(f"{'total':<{width}}  {self.total:>9.3f}")
+        return "\n".join(lines)
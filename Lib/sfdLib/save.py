@@ -0,0 +1,195 @@
+import contextlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fontTools.ufoLib import UFOWriter
+from fontTools.ufoLib.glifLib import writeGlyphToString
+
+# Glyphs serialized by each worker task.
+CHUNK_SIZE = 256
+
+OBJECT_LIBS_KEY = "public.objectLibs"
+
+
+@contextlib.contextmanager
+def replacing(path):
+    """Yield a temporary path to write a UFO to, that replaces path when done.
+
+    The temporary UFO is next to path, so it is only renamed in the end, and
+    path is left alone if writing fails.
+    """
+    path = os.path.normpath(path)
+    tmp = tempfile.mkdtemp(
+        prefix=".sfdlib-", dir=os.path.dirname(os.path.abspath(path))
+    )
+    try:
+        tmpPath = os.path.join(tmp, os.path.basename(path))
+        yield tmpPath
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+        os.rename(tmpPath, path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _glyphIdentifiers(glyph):
+    """Return the identifiers of all the objects of a glyph."""
+    objects = [*glyph.anchors, *glyph.guidelines, *glyph.components]
+    for contour in glyph.contours:
+        objects.append(contour)
+        objects.extend(contour)
+    return {o.identifier for o in objects} - {None}
+
+
+def _pruneObjectLibs(lib, identifiers):
+    """Drop the object libs of objects that are gone, and empty ones, from lib.
+
+    This is what ufoLib2 does before writing a lib.
+    """
+    objectLibs = lib[OBJECT_LIBS_KEY]
+    lib[OBJECT_LIBS_KEY] = {
+        k: v for k, v in objectLibs.items() if k in identifiers and v
+    }
+
+
+class _GlifGlyph:
+    """Just enough of a glyph to write it out, and cheap to pickle.
+
+    Contours and components are kept as tuples, and drawn the same way
+    ufoLib2 draws them.
+    """
+
+    __slots__ = (
+        "name",
+        "width",
+        "height",
+        "unicodes",
+        "note",
+        "image",
+        "guidelines",
+        "anchors",
+        "lib",
+        "contours",
+        "components",
+    )
+
+    def __init__(self, glyph):
+        self.name = glyph.name
+        self.width = glyph.width
+        self.height = glyph.height
+        self.unicodes = glyph.unicodes
+        self.note = glyph.note
+        self.image = glyph.image
+        self.guidelines = glyph.guidelines
+        self.anchors = glyph.anchors
+        self.lib = glyph.lib
+        self.contours = [
+            (
+                contour.identifier,
+                [(p.x, p.y, p.type, p.smooth, p.name, p.identifier) for p in contour],
+            )
+            for contour in glyph.contours
+        ]
+        self.components = [
+            (c.baseGlyph, tuple(c.transformation), c.identifier)
+            for c in glyph.components
+        ]
+
+    def drawPoints(self, pointPen):
+        for identifier, points in self.contours:
+            pointPen.beginPath(identifier=identifier)
+            for x, y, segmentType, smooth, name, pointIdentifier in points:
+                pointPen.addPoint(
+                    (x, y),
+                    segmentType=segmentType,
+                    smooth=smooth,
+                    name=name,
+                    identifier=pointIdentifier,
+                )
+            pointPen.endPath()
+        for baseGlyph, transformation, identifier in self.components:
+            pointPen.addComponent(baseGlyph, transformation, identifier=identifier)
+
+
+def _serializeGlyphs(glyphs):
+    return [
+        writeGlyphToString(glyph.name, glyph, glyph.drawPoints, validate=False)
+        for glyph in glyphs
+    ]
+
+
+def _writeFile(path, text):
+    with open(path, "wb") as fp:
+        fp.write(text.encode("utf-8"))
+
+
+def _writeLayer(layer, glyphSet, processes, threads):
+    # File names are given in glyph order, as GlyphSet.writeGlyph() would.
+    existing = set()
+    for name in layer.keys():
+        fileName = glyphSet.glyphNameToFileName(name, existing)
+        existing.add(fileName.lower())
+        glyphSet.contents[name] = fileName
+
+    chunks = []
+    chunk = []
+    for glyph in layer:
+        # Same as Layer.write().
+        if OBJECT_LIBS_KEY in glyph.lib:
+            _pruneObjectLibs(glyph.lib, _glyphIdentifiers(glyph))
+        chunk.append(_GlifGlyph(glyph))
+        if len(chunk) == CHUNK_SIZE:
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+
+    writes = []
+    names = iter(layer.keys())
+    for texts in processes.map(_serializeGlyphs, chunks):
+        for text in texts:
+            path = glyphSet.fs.getsyspath(glyphSet.contents[next(names)])
+            writes.append(threads.submit(_writeFile, path, text))
+    glyphSet.writeContents()
+    glyphSet.writeLayerInfo(layer)
+    return writes
+
+
+def saveFont(font, path, jobs):
+    """Save font to path like Font.save() does, with jobs processes.
+
+    Glyphs are serialized in a process pool and their files written from a
+    thread pool, everything else is written as usual. The UFO is the same,
+    byte for byte, as a serial save.
+    """
+    with replacing(path) as tmpPath:
+        with UFOWriter(tmpPath, validate=False) as writer:
+            writer.writeFeatures(font.features.text)
+            writer.writeGroups(font.groups)
+            writer.writeInfo(font.info)
+            writer.writeKerning(font.kerning)
+            if OBJECT_LIBS_KEY in font.lib:
+                identifiers = {g.identifier for g in font.guidelines}
+                _pruneObjectLibs(font.lib, identifiers - {None})
+            writer.writeLib(font.lib)
+
+            defaultLayer = font.layers.defaultLayer
+            with ProcessPoolExecutor(jobs) as processes:
+                with ThreadPoolExecutor() as threads:
+                    writes = []
+                    for layer in font.layers:
+                        glyphSet = writer.getGlyphSet(
+                            layer.name, defaultLayer=layer is defaultLayer
+                        )
+                        writes += _writeLayer(layer, glyphSet, processes, threads)
+                    for write in writes:
+                        write.result()
+            writer.writeLayerContents(font.layers.layerOrder)
+
+            font.data.write(writer, saveAs=True)
+            font.images.write(writer, saveAs=True)
+        writer.setModificationTime()
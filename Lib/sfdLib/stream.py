@@ -0,0 +1,254 @@
+import contextlib
+import os
+import pathlib
+
+from fontTools.misc.transform import Identity
+from fontTools.pens.boundsPen import ControlBoundsPen
+from fontTools.ufoLib import UFOWriter
+from ufoLib2 import Font
+from ufoLib2.objects import Glyph, Layer
+from ufoLib2.objects.misc import BoundingBox, unionBounds
+
+from .parser import ENCODING_RE, STARTCHAR_RE, GlyphOrder, SFDParser, SFDReadUTF7
+from .save import replacing
+
+
+def _dirOrders(path):
+    """Return the glyph name to order mapping of an SFD directory."""
+    orders = {}
+    for filename in pathlib.Path(path).glob("*.glyph"):
+        with open(filename) as fp:
+            text = fp.read()
+        name = STARTCHAR_RE.search(text).group(1)
+        if name.startswith('"'):
+            name = SFDReadUTF7(name)
+        orders[name] = int(ENCODING_RE.search(text).group(1))
+    return orders
+
+
+def _transformBounds(bounds, transformation):
+    x0, y0 = transformation.transformPoint((bounds.xMin, bounds.yMin))
+    x1, y1 = transformation.transformPoint((bounds.xMax, bounds.yMax))
+    return BoundingBox(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+
+class StreamingSFDParser(SFDParser):
+    """Parses an SFD file or SFDIR directory, writing glyphs as it goes.
+
+    Each glyph is written to writer, a fontTools UFOWriter, as soon as it is
+    parsed and its references are resolved, and then dropped from the font, so
+    memory use does not grow with the number of glyphs. The names and orders of
+    all glyphs are read first, so that references can be resolved right away.
+    Whatever is derived from all glyphs (the font bounding box and the renaming
+    of cursive UFO anchors) is computed from what is kept of each glyph, or from
+    the written files. Call save() once parsed to write the rest of the font.
+
+    Without a writer, glyphs are kept like SFDParser does, which is what worker
+    processes of a parallel parse do.
+    """
+
+    def __init__(
+        self,
+        path,
+        font,
+        ufo_anchors=False,
+        ufo_kerning=False,
+        minimal=False,
+        jobs=1,
+        profiler=None,
+        writer=None,
+    ):
+        super().__init__(
+            path, font, ufo_anchors, ufo_kerning, minimal, jobs, profiler=profiler
+        )
+        self._writer = writer
+        self._glyphSets = {}
+        self._unicodes = {}
+        # Control bounds of the contours of each default layer glyph, and the
+        # components of those that have any.
+        self._bounds = {}
+        self._components = {}
+        self._cursiveAnchors = set()
+        self._cursiveGlyphs = []
+
+    def _newLayers(self):
+        super()._newLayers()
+        if self._writer is None:
+            return
+        layers = {}
+        for idx, layer in enumerate(self._layers):
+            if layer is not None and not isinstance(layer, str):
+                layers[layer.name] = idx
+        # In font order, which decides the names of the layer directories.
+        defaultLayer = self._font.layers.defaultLayer
+        for layer in self._font.layers:
+            glyphSet = self._writer.getGlyphSet(
+                layer.name, defaultLayer=layer is defaultLayer
+            )
+            self._glyphSets[layers[layer.name]] = glyphSet
+
+    def parse(self):
+        glyphCount = lambda: len(self._unicodes)
+        if os.path.isdir(self._path):
+            props = os.path.join(self._path, "font.props")
+            if not os.path.isfile(props):
+                raise Exception("Not an SFD directory")
+            with self._phase("header", lambda: self._headerRecords):
+                with open(props) as fd:
+                    offsetMetrics = self._parseHeader(fd)
+                self._newLayers()
+                self._glyphOrder = GlyphOrder(_dirOrders(self._path))
+            with self._phase("parseChars", glyphCount):
+                self._parseChars(self._readGlyphFiles())
+        else:
+            from .index import SFDIndex
+
+            with contextlib.ExitStack() as stack:
+                with self._phase("header", lambda: self._headerRecords):
+                    index = stack.enter_context(SFDIndex(self._path))
+                    offsetMetrics = self._parseHeader(index.headerLines())
+                    self._newLayers()
+                    orders = dict(zip(index.names, index.orders))
+                    self._glyphOrder = GlyphOrder(orders)
+                with self._phase("parseChars", glyphCount):
+                    if self._jobs > 1:
+                        self._parseCharsParallel(len(index))
+                    else:
+                        self._parseChars(index.records())
+
+        self._finish(offsetMetrics)
+
+    def _setGlyphOrder(self, glyphOrderMap, unicodes=None):
+        if self._writer is None:
+            return super()._setGlyphOrder(glyphOrderMap, unicodes)
+        # The glyphs are gone from the font by now.
+        assert len(self._unicodes) == len(glyphOrderMap)
+        self._font.glyphOrder = self._glyphOrder.sort(self._unicodes)
+
+    def _glyphParsed(self, name):
+        if self._writer is None:
+            return
+        defaultLayer = self._font.layers.defaultLayer
+        for layerIdx, glyphSet in self._glyphSets.items():
+            layer = self._layers[layerIdx]
+            if name not in layer:
+                continue
+            refs = self._glyphRefs.pop((name, layerIdx), None)
+            if refs is not None:
+                self._addReferences(name, layerIdx, refs)
+            glyph = layer[name]
+            if layer is defaultLayer:
+                self._keepGlyphInfo(glyph)
+            glyphSet.writeGlyph(name, glyph, glyph.drawPoints)
+            del layer[name]
+
+    def _keepGlyphInfo(self, glyph):
+        name = glyph.name
+        self._unicodes[name] = glyph.unicode
+
+        pen = ControlBoundsPen(None)
+        for contour in glyph.contours:
+            contour.draw(pen)
+        self._bounds[name] = pen.bounds and BoundingBox(*pen.bounds)
+        if glyph.components:
+            self._components[name] = [
+                (c.baseGlyph, c.transformation) for c in glyph.components
+            ]
+
+        cursive = False
+        for anchor in glyph.anchors:
+            if anchor.name.startswith(("exit.", "entry.")):
+                self._cursiveAnchors.add(anchor.name.split(".", 1)[1])
+                cursive = True
+        if cursive:
+            self._cursiveGlyphs.append(name)
+
+    def _fixUFOAnchors(self):
+        if self._writer is None:
+            return super()._fixUFOAnchors()
+        if not self._use_ufo_anchors or len(self._cursiveAnchors) != 1:
+            return
+
+        # Read the few glyphs with cursive anchors back and write them again.
+        glyphSet = self._glyphSets[1]
+        for name in self._cursiveGlyphs:
+            glyph = Glyph(name)
+            glyphSet.readGlyph(name, glyph, glyph.getPointPen())
+            for anchor in glyph.anchors:
+                if anchor.name.startswith(("exit.", "entry.")):
+                    anchor.name = anchor.name.split(".")[0]
+            glyphSet.writeGlyph(name, glyph, glyph.drawPoints)
+
+    def _leaves(self, name, transformation):
+        # Like a decomposing pen does, transformations of nested components
+        # are combined before transforming any point.
+        yield name, transformation
+        for baseGlyph, componentTransformation in self._components.get(name, ()):
+            if baseGlyph in self._bounds:
+                combined = transformation.transform(componentTransformation)
+                yield from self._leaves(baseGlyph, combined)
+
+    def _fontBounds(self):
+        if self._writer is None:
+            return super()._fontBounds()
+        written = Layer.read("public.default", self._glyphSets[1])
+        bounds = None
+        for name in self._unicodes:
+            leaves = list(self._leaves(name, Identity))
+            if any(t[1] or t[2] for _, t in leaves):
+                # Rotated or skewed, the bounds of the contours tell nothing.
+                bounds = unionBounds(bounds, written[name].getControlBounds(written))
+                continue
+            for leaf, transformation in leaves:
+                if self._bounds[leaf] is not None:
+                    leafBounds = _transformBounds(self._bounds[leaf], transformation)
+                    bounds = unionBounds(bounds, leafBounds)
+        return bounds
+
+    def save(self):
+        """Write everything but the glyphs, once the font is parsed."""
+        font = self._font
+        writer = self._writer
+        writer.writeFeatures(font.features.text)
+        writer.writeGroups(font.groups)
+        writer.writeInfo(font.info)
+        writer.writeKerning(font.kerning)
+        writer.writeLib(font.lib)
+        for layerIdx, glyphSet in self._glyphSets.items():
+            glyphSet.writeContents()
+            glyphSet.writeLayerInfo(self._layers[layerIdx])
+        writer.writeLayerContents(font.layers.layerOrder)
+
+
+def convert(
+    sfdfile,
+    ufofile,
+    ufo_anchors=False,
+    ufo_kerning=False,
+    minimal=False,
+    jobs=1,
+    profiler=None,
+):
+    """Convert sfdfile to ufofile, writing glyphs as they are parsed.
+
+    The UFO is written next to ufofile first, and only replaces it once
+    complete. Returns the parser.
+    """
+    with replacing(ufofile) as path:
+        with UFOWriter(path, validate=False) as writer:
+            parser = StreamingSFDParser(
+                sfdfile,
+                Font(),
+                ufo_anchors,
+                ufo_kerning,
+                minimal,
+                jobs,
+                profiler,
+                writer,
+            )
+            parser.parse()
+            with parser._phase("save"):
+                parser.save()
+        writer.setModificationTime()
+
+    return parser
@@ -0,0 +1,184 @@
+"""Benchmark sfdLib on synthetic fonts.
+
+Each suite generates a font with sfdgen and times SFDParser.parse() end to end,
+then the feature writers on their own. Results can be written as JSON, and
+compared with those of a previous run:
+
+    python benchmarks/bench.py -o before.json
+    ...
+    python benchmarks/bench.py -o after.json --compare before.json
+
+The sfdLib of this checkout is benchmarked, not the installed one.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Lib"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ufoLib2 import Font
+
+from sfdgen import generate
+from sfdLib.parser import SFDParser, _kernClassesToUFO
+
+SUITES = {
+    "latin": dict(glyphs=1000),
+    "quadratic": dict(glyphs=2000, points=24, quadratic=True),
+    "cjk": dict(
+        glyphs=20000,
+        points=48,
+        refs=0.3,
+        kernClasses=(0, 0),
+        kernPairs=0,
+        lookups=2,
+        anchorClasses=0,
+    ),
+    "arabic": dict(
+        glyphs=2000,
+        refs=0.2,
+        kernClasses=(64, 64),
+        kernPairs=16,
+        lookups=40,
+        anchorClasses=16,
+        scripts=4,
+        languages=4,
+    ),
+    "dense": dict(glyphs=1000, blankLines=False),
+}
+
+
+def _time(func, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return dict(min=min(times), median=statistics.median(times), times=times)
+
+
+def _parse(path):
+    font = Font()
+    parser = SFDParser(path, font)
+    parser.parse()
+    return parser
+
+
+def _writeAnchorClasses(parser):
+    for lookup, subtables in parser._gposLookups.items():
+        for subtable in subtables:
+            if subtable in parser._anchorClasses:
+                parser._writeAnchorClass(lookup, subtable)
+
+
+def runSuite(params, repeat):
+    """Run the benchmarks on a font generated with the given parameters."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "font.sfd")
+        with open(path, "w") as fp:
+            fp.write(generate(**params))
+
+        results["parse"] = _time(lambda: _parse(path), repeat)
+
+        parser = _parse(path)
+        font = parser._font
+
+        def clearFeatures():
+            font.features.text = ""
+
+        results["writeGSUB"] = _time(
+            lambda: parser._writeGSUBGPOS(isgpos=False), repeat, clearFeatures
+        )
+        results["writeGPOS"] = _time(
+            lambda: parser._writeGSUBGPOS(isgpos=True), repeat, clearFeatures
+        )
+        results["writeAnchorClass"] = _time(lambda: _writeAnchorClasses(parser), repeat)
+        subtables = list(parser._kernClasses.values())
+        results["kernClassesToUFO"] = _time(
+            lambda: _kernClassesToUFO(subtables), repeat
+        )
+    return results
+
+
+def compare(old, new):
+    """Return a table comparing the median times of two runs."""
+    lines = [f"{'benchmark':<28}  {'old':>9}  {'new':>9}  {'change':>7}"]
+    for suite, results in new["suites"].items():
+        oldResults = old["suites"].get(suite, {}).get("results", {})
+        for name, result in results["results"].items():
+            if name not in oldResults:
+                continue
+            before = oldResults[name]["median"]
+            after = result["median"]
+            change = f"{(after - before) / before:+.0%}" if before else ""
+            lines.append(
+                f"{suite + '/' + name:<28}  {before:>9.4f}  {after:>9.4f}  {change:>7}"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sfdLib.")
+    parser.add_argument(
+        "suites",
+        metavar="SUITE",
+        nargs="*",
+        help=f"suites to run (default: all of {', '.join(SUITES)})",
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="times to run each benchmark"
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiply the number of glyphs of each suite by this",
+    )
+    parser.add_argument("-o", "--output", metavar="FILE", help="write results JSON")
+    parser.add_argument(
+        "--compare", metavar="FILE", help="compare with the results JSON of a run"
+    )
+    args = parser.parse_args()
+
+    for suite in args.suites:
+        if suite not in SUITES:
+            parser.error(f"unknown suite: {suite}")
+
+    run = dict(
+        date=datetime.datetime.now().isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        machine=platform.machine(),
+        suites={},
+    )
+    for suite in args.suites or SUITES:
+        params = dict(SUITES[suite])
+        params["glyphs"] = max(1, round(params["glyphs"] * args.scale))
+        results = runSuite(params, args.repeat)
+        run["suites"][suite] = dict(params=params, results=results)
+        for name, result in results.items():
+            print(f"{suite}/{name}: {result['median']:.4f}s")
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(run, fp, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            old = json.load(fp)
+        print()
+        print(compare(old, run))
+
+
+if __name__ == "__main__":
+    main()
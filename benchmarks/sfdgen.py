@@ -0,0 +1,236 @@
+"""Generate synthetic SFD fonts for benchmarking.
+
+The fonts are deterministic for a given set of parameters and seed, so
+benchmark results of different runs can be compared.
+"""
+
+import argparse
+import math
+import random
+
+SCRIPTS = ["DFLT", "latn", "arab", "cyrl", "grek", "hani", "deva", "hebr"]
+LANGUAGES = ["dflt", "TRK ", "ROM ", "MOL ", "URD ", "FAR ", "SRB ", "NLD "]
+
+
+def _langsys(scripts, languages):
+    langsys = []
+    for script in SCRIPTS[:scripts]:
+        langs = " ".join(f"'{l}'" for l in LANGUAGES[:languages])
+        langsys.append(f"'{script}' <{langs} >")
+    return " ".join(langsys)
+
+
+def _lookup(kind, name, subtables, feature, langsys):
+    subtables = " ".join(f'"{s}"' for s in subtables)
+    return (
+        f"Lookup: {kind} 0 0 \"{name}\" {{ {subtables} }} ['{feature}' ({langsys} ) ]"
+    )
+
+
+def _splineSet(rng, points, quadratic):
+    """Return the SplineSet of one closed contour with the given number of
+    segments, alternating lines and curves."""
+    cx = rng.randint(300, 700)
+    cy = rng.randint(300, 500)
+    r = rng.randint(100, 300)
+
+    def point(i):
+        angle = 2 * math.pi * i / points
+        return round(cx + r * math.cos(angle)), round(cy + r * math.sin(angle))
+
+    x0, y0 = point(0)
+    lines = [f"{x0} {y0} m 1"]
+    for i in range(1, points + 1):
+        x, y = point(i % points)
+        if i % 2:
+            lines.append(f" {x} {y} l 1")
+            continue
+        px, py = point(i - 1)
+        if quadratic:
+            # Quadratic layers repeat the single control point.
+            qx = round((px + x) / 2 + (y - py) / 4)
+            qy = round((py + y) / 2 - (x - px) / 4)
+            lines.append(f" {qx} {qy} {qx} {qy} {x} {y} c 0")
+        else:
+            c1 = round(px + (x - px) / 3), round(py + (y - py) / 3 + 20)
+            c2 = round(px + 2 * (x - px) / 3), round(py + 2 * (y - py) / 3 + 20)
+            lines.append(f" {c1[0]} {c1[1]} {c2[0]} {c2[1]} {x} {y} c 0")
+    return ["SplineSet"] + lines + ["EndSplineSet"]
+
+
+def generate(
+    glyphs=1000,
+    points=16,
+    quadratic=False,
+    refs=0.1,
+    kernClasses=(16, 16),
+    kernPairs=4,
+    lookups=8,
+    anchorClasses=4,
+    scripts=2,
+    languages=2,
+    seed=0,
+    blankLines=True,
+):
+    """Return the text of a synthetic SFD font.
+
+    glyphs is the number of glyphs, points the number of segments of the
+    contour of each simple glyph, and quadratic whether the outlines layer is
+    quadratic instead of cubic. refs is the fraction of glyphs that are made of
+    a reference to another glyph instead. kernClasses is the number of first
+    and second classes of the KernClass2 subtable, kernPairs the number of
+    Kerns2 pairs of each glyph and lookups the number of single substitution
+    lookups. There are anchorClasses mark positioning anchor classes, every
+    tenth glyph is a mark with an anchor of one of them and the other glyphs
+    have base anchors of all of them. All lookups are registered for the first
+    scripts scripts and languages languages of each. Glyph records are
+    separated by blank lines, as FontForge writes them, unless blankLines is
+    false.
+    """
+    rng = random.Random(seed)
+    langsys = _langsys(scripts, languages)
+    names = [f"g{i:05d}" for i in range(glyphs)]
+
+    lines = [
+        "SplineFontDB: 3.0",
+        "FontName: Synthetic-Regular",
+        "FullName: Synthetic Regular",
+        "FamilyName: Synthetic",
+        "Weight: Regular",
+        "Version: 1.000",
+        "ItalicAngle: 0",
+        "UnderlinePosition: -100",
+        "UnderlineWidth: 50",
+        "Ascent: 800",
+        "Descent: 200",
+        "LayerCount: 2",
+        'Layer: 0 0 "Back" 1',
+        f'Layer: 1 {int(quadratic)} "Fore" 0',
+        "OS2TypoAscent: 0",
+        "OS2TypoAOffset: 1",
+        "OS2TypoDescent: 0",
+        "OS2TypoDOffset: 1",
+    ]
+
+    for i in range(lookups):
+        feature = f"ss{i % 20 + 1:02d}"
+        lines.append(_lookup(1, f"single {i}", [f"single {i} sub"], feature, langsys))
+    kernSubtables = []
+    if kernPairs:
+        kernSubtables.append("kern pairs")
+    if kernClasses[0] > 1 and kernClasses[1] > 1:
+        kernSubtables.append("kern classes")
+    if kernSubtables:
+        lines.append(_lookup(258, "kern", kernSubtables, "kern", langsys))
+    if anchorClasses:
+        lines.append(_lookup(260, "mark", ["mark sub"], "mark", langsys))
+
+    if "kern classes" in kernSubtables:
+        n1, n2 = kernClasses
+        lines.append(f'KernClass2: {n1} {n2} "kern classes"')
+        for n in (n1, n2):
+            for c in range(1, n):
+                members = " ".join(names[c - 1 :: n - 1])
+                lines.append(f" {len(members)} {members}")
+        kerns = []
+        for _ in range(n1 * n2):
+            kern = rng.choice([0, 0, rng.randint(-100, 100)])
+            kerns.append(f"{kern} {{}}")
+        lines.append(" " + " ".join(kerns))
+
+    if anchorClasses:
+        value = " ".join(f'"a{i}" "mark sub"' for i in range(anchorClasses))
+        lines.append(f"AnchorClass2: {value}")
+
+    lines += [
+        "Encoding: UnicodeFull",
+        "DisplaySize: -48",
+        "WinInfo: 0 30 10",
+        f"BeginChars: 1114112 {glyphs}",
+    ]
+
+    for i, name in enumerate(names):
+        mark = i % 10 == 9
+        if blankLines:
+            lines.append("")
+        lines += [
+            f"StartChar: {name}",
+            f"Encoding: {0x4E00 + i} {0x4E00 + i} {i}",
+            f"Width: {0 if mark else rng.randint(400, 1000)}",
+        ]
+        if mark:
+            lines.append("GlyphClass: 4")
+        lines += ["Flags: W", "LayerCount: 2", "Fore"]
+        if i and rng.random() < refs:
+            gid = rng.randrange(i)
+            dx = rng.randint(-100, 100)
+            lines.append(f"Refer: {gid} {0x4E00 + gid} N 1 0 0 1 {dx} 0 2")
+        else:
+            lines += _splineSet(rng, points, quadratic)
+        classes = range(anchorClasses)
+        if mark and anchorClasses:
+            # A glyph can be in only one mark class, take turns.
+            classes = [i // 10 % anchorClasses]
+        for a in classes:
+            kind = "mark" if mark else "basechar"
+            x = rng.randint(0, 1000)
+            lines.append(f'AnchorPoint: "a{a}" {x} 700 {kind} 0')
+        if kernPairs:
+            pairs = []
+            for _ in range(kernPairs):
+                pairs.append(
+                    f'{rng.randrange(glyphs)} {rng.randint(-100, 100)} "kern pairs"'
+                )
+            lines.append("Kerns2: " + " ".join(pairs))
+        if lookups and i + 1 < glyphs:
+            lines.append(f'Substitution2: "single {i % lookups} sub" {names[i + 1]}')
+        lines.append("EndChar")
+
+    lines += ["EndChars", "EndSplineFont", ""]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic SFD font.")
+    parser.add_argument("output", metavar="FILE", help="SFD file to write")
+    parser.add_argument("--glyphs", type=int, default=1000)
+    parser.add_argument("--points", type=int, default=16)
+    parser.add_argument("--quadratic", action="store_true")
+    parser.add_argument("--refs", type=float, default=0.1)
+    parser.add_argument(
+        "--kern-classes", type=int, nargs=2, default=(16, 16), metavar=("N1", "N2")
+    )
+    parser.add_argument("--kern-pairs", type=int, default=4)
+    parser.add_argument("--lookups", type=int, default=8)
+    parser.add_argument("--anchor-classes", type=int, default=4)
+    parser.add_argument("--scripts", type=int, default=2)
+    parser.add_argument("--languages", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-blank-lines",
+        dest="blank_lines",
+        action="store_false",
+        help="do not separate glyph records with blank lines",
+    )
+    args = parser.parse_args()
+
+    text = generate(
+        args.glyphs,
+        args.points,
+        args.quadratic,
+        args.refs,
+        args.kern_classes,
+        args.kern_pairs,
+        args.lookups,
+        args.anchor_classes,
+        args.scripts,
+        args.languages,
+        args.seed,
+        args.blank_lines,
+    )
+    with open(args.output, "w") as fp:
+        fp.write(text)
+
+
+if __name__ == "__main__":
+    main()
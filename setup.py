@@ -14,7 +14,11 @@ setup(
         "sfdLib",
     ],
     entry_points = {
-        'console_scripts': ['sfd2ufo = sfdLib.__main__:main'],
+        'console_scripts': [
+            'sfd2ufo = sfdLib.__main__:main',
+            'sfd2otf = sfdLib.compiler:sfd2otf',
+            'sfd2ttf = sfdLib.compiler:sfd2ttf',
+        ],
     },
     package_dir = {'': 'Lib'},
     classifiers = [
@@ -0,0 +1,110 @@
+import io
+import itertools
+import pathlib
+import re
+import sys
+
+import pytest
+from fontTools.misc.xmlWriter import XMLWriter
+from fontTools.ttLib import newTable
+from ufoLib2 import Font
+
+BENCHMARKS = pathlib.Path(__file__).parent.parent / "benchmarks"
+
+
+@pytest.fixture
+def datadir():
+    return pathlib.Path(__file__).parent / "data"
+
+
+@pytest.fixture
+def sfdir(tmp_path, datadir):
+    """Return Test.sfd split into an SFDir directory."""
+    path = tmp_path / "Test.sfdir"
+    path.mkdir()
+    text = (datadir / "Test.sfd").read_text()
+    head, rest = text.split("BeginChars:", 1)
+    chars, tail = rest.split("EndChars\n", 1)
+    (path / "font.props").write_text(head + tail)
+    for m in re.finditer(r"StartChar: (.*?)\n.*?EndChar\n", chars, re.S):
+        (path / f"{m.group(1)}.glyph").write_text(m.group(0))
+    return path
+
+
+@pytest.fixture
+def generate():
+    """Return the generate() function of the benchmark font generator."""
+    sys.path.insert(0, str(BENCHMARKS))
+    try:
+        import sfdgen
+    finally:
+        sys.path.remove(str(BENCHMARKS))
+    return sfdgen.generate
+
+
+@pytest.fixture
+def reopen(tmp_path):
+    """Return a function saving a font and reading it back, so that fonts made
+    in different ways compare equal."""
+    counter = itertools.count()
+
+    def reopen(font):
+        path = tmp_path / f"reopen{next(counter)}.ufo"
+        font.save(path, overwrite=True, validate=False)
+        return Font.open(path, validate=False)
+
+    return reopen
+
+
+@pytest.fixture
+def ufoFiles():
+    """Return a function returning the contents of the files of a UFO, by
+    relative path, to compare UFOs byte for byte."""
+
+    def ufoFiles(path):
+        path = pathlib.Path(path)
+        files = (p for p in path.rglob("*") if p.is_file())
+        return {str(p.relative_to(path)): p.read_bytes() for p in files}
+
+    return ufoFiles
+
+
+@pytest.fixture
+def nestedLookups():
+    """Return a function returning the lookup types of each contextual lookup
+    of a GSUB or GPOS table, with the types of the lookups it applies."""
+
+    def nestedLookups(table):
+        lookups = table.LookupList.Lookup
+        nested = []
+        for lookup in lookups:
+            if lookup.LookupType not in (5, 6, 7, 8):
+                continue
+            records = []
+            for subtable in lookup.SubTable:
+                records += getattr(subtable, "SubstLookupRecord", None) or []
+                records += getattr(subtable, "PosLookupRecord", None) or []
+            types = [lookups[r.LookupListIndex].LookupType for r in records]
+            nested.append((lookup.LookupType, types))
+        return sorted(nested)
+
+    return nestedLookups
+
+
+@pytest.fixture
+def layoutTables():
+    """Return a function returning the XML of the GSUB, GPOS and GDEF tables
+    of a TTFont, as they compile, by tag."""
+
+    def layoutTables(ttFont):
+        tables = {}
+        for tag in ("GSUB", "GPOS", "GDEF"):
+            if tag in ttFont:
+                table = newTable(tag)
+                table.decompile(ttFont[tag].compile(ttFont), ttFont)
+                writer = io.StringIO()
+                table.toXML(XMLWriter(writer), ttFont)
+                tables[tag] = writer.getvalue()
+        return tables
+
+    return layoutTables
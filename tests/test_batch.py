@@ -0,0 +1,50 @@
+import pytest
+from ufoLib2 import Font
+
+from sfdLib.batch import convertMany, readBatch
+from sfdLib.parser import SFDParser
+
+
+def test_readBatch(tmp_path):
+    path = tmp_path / "batch.txt"
+    path.write_text("# fonts\nA.sfd A.ufo\n\n  B.sfdir  /out/B.ufo\n")
+    assert readBatch(path) == [
+        (str(tmp_path / "A.sfd"), str(tmp_path / "A.ufo")),
+        (str(tmp_path / "B.sfdir"), "/out/B.ufo"),
+    ]
+
+    path.write_text("A.sfd\n")
+    with pytest.raises(Exception, match="batch.txt:1"):
+        readBatch(path)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+@pytest.mark.parametrize("incremental", [False, True])
+def test_convertMany(tmp_path, datadir, jobs, incremental):
+    sfd = str(datadir / "Test.sfd")
+    missing = str(tmp_path / "Missing.sfd")
+    pairs = [
+        (sfd, str(tmp_path / "A.ufo")),
+        (missing, str(tmp_path / "Missing.ufo")),
+        (sfd, str(tmp_path / "B.ufo")),
+    ]
+    results = {}
+    for sfdfile, ufofile, seconds, error in convertMany(
+        pairs, jobs=jobs, incremental=incremental
+    ):
+        results[ufofile] = (seconds, error)
+
+    font = Font()
+    SFDParser(sfd, font).parse()
+    font.save(tmp_path / "full.ufo", validate=False)
+    expected = Font.open(tmp_path / "full.ufo", validate=False)
+    for name in ("A.ufo", "B.ufo"):
+        seconds, error = results[str(tmp_path / name)]
+        assert error is None
+        assert seconds > 0
+        assert Font.open(tmp_path / name, validate=False) == expected
+
+    # Failures have no time, it would include waiting for other fonts.
+    seconds, error = results[str(tmp_path / "Missing.ufo")]
+    assert seconds is None
+    assert isinstance(error, FileNotFoundError)
@@ -0,0 +1,49 @@
+import pytest
+from ufoLib2 import Font
+
+from sfdLib.compiler import compileFont
+from sfdLib.layout import LayoutSFDParser
+from sfdLib.parser import SFDParser
+from sfdLib.profiler import Profiler
+
+ufo2ft = pytest.importorskip("ufo2ft")
+
+
+def _parse(path, parserClass=SFDParser):
+    font = Font()
+    parser = parserClass(str(path), font, minimal=True)
+    parser.parse()
+    return font, parser
+
+
+@pytest.mark.parametrize("format", ["otf", "ttf"])
+def test_compile(tmp_path, generate, layoutTables, format):
+    path = tmp_path / "font.sfd"
+    path.write_text(generate(glyphs=200))
+
+    font, _ = _parse(path)
+    build = ufo2ft.compileOTF if format == "otf" else ufo2ft.compileTTF
+    expected = build(font)
+
+    font, _ = _parse(path)
+    profiler = Profiler()
+    ttFont = compileFont(font, format, profiler=profiler)
+    assert ttFont.getGlyphOrder() == expected.getGlyphOrder()
+    assert layoutTables(ttFont) == layoutTables(expected)
+    (phase,) = profiler.phases
+    assert phase["name"] == "compile"
+    assert phase["stages"]
+
+    font, parser = _parse(path, LayoutSFDParser)
+    ttFont = compileFont(font, format, layout=parser)
+    assert ttFont.getGlyphOrder() == expected.getGlyphOrder()
+    tables = layoutTables(ttFont)
+    expectedTables = layoutTables(expected)
+    for tag in ("GSUB", "GPOS"):
+        assert tables[tag] == expectedTables[tag]
+
+
+def test_compile_format(datadir):
+    font, _ = _parse(datadir / "ChainForward.sfd")
+    with pytest.raises(Exception, match="Unsupported format: woff"):
+        compileFont(font, "woff")
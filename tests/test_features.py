@@ -0,0 +1,41 @@
+import pytest
+from fontTools.feaLib.builder import Builder, addOpenTypeFeaturesFromString
+from fontTools.ttLib import TTFont
+from ufoLib2 import Font
+
+from sfdLib.parser import SFDParser
+
+
+def test_feature_ast_chain_forward_reference(datadir, nestedLookups):
+    # Contextual lookups applying lookups that come after them in the font.
+    font = Font()
+    parser = SFDParser(datadir / "ChainForward.sfd", font, feature_ast=True)
+    parser.parse()
+
+    ttFont = TTFont()
+    ttFont.setGlyphOrder(font.glyphOrder)
+    Builder(ttFont, parser.featureFile).build()
+
+    # The lookup without rules is dropped from the rule applying it.
+    assert nestedLookups(ttFont["GSUB"].table) == [(5, [6]), (6, [1])]
+    assert nestedLookups(ttFont["GPOS"].table) == [(8, [1])]
+
+
+@pytest.mark.parametrize("options", [(False, False), (True, True)])
+def test_feature_ast(tmp_path, generate, layoutTables, options):
+    path = tmp_path / "font.sfd"
+    path.write_text(generate(glyphs=500))
+    fonts = []
+    for feature_ast in (False, True):
+        font = Font()
+        parser = SFDParser(str(path), font, *options, feature_ast=feature_ast)
+        parser.parse()
+        ttFont = TTFont()
+        ttFont.setGlyphOrder(font.glyphOrder)
+        if feature_ast:
+            assert not font.features.text
+            Builder(ttFont, parser.featureFile).build()
+        else:
+            addOpenTypeFeaturesFromString(ttFont, font.features.text)
+        fonts.append(ttFont)
+    assert layoutTables(fonts[1]) == layoutTables(fonts[0])
@@ -0,0 +1,59 @@
+import re
+import shutil
+
+import pytest
+from ufoLib2 import Font
+
+from sfdLib.incremental import convert
+from sfdLib.parser import SFDParser
+
+
+def _edit(path, pattern, repl):
+    text = path.read_text()
+    new = re.sub(pattern, repl, text, count=1, flags=re.M)
+    assert new != text
+    path.write_text(new)
+
+
+def _parse(path, options, tmp_path):
+    """Return the font SFDParser makes of path, as read back from a UFO."""
+    font = Font()
+    SFDParser(str(path), font, *options).parse()
+    font.save(tmp_path / "full.ufo", overwrite=True, validate=False)
+    return Font.open(tmp_path / "full.ufo", validate=False)
+
+
+@pytest.mark.parametrize("options", [(False, False, False), (True, True, False)])
+def test_incremental(tmp_path, datadir, options):
+    sfd = tmp_path / "Test.sfd"
+    ufo = str(tmp_path / "Test.ufo")
+    shutil.copy(datadir / "Test.sfd", sfd)
+
+    parser = convert(str(sfd), ufo, *options)
+    assert parser.parsed == set(Font.open(ufo, validate=False).keys())
+    assert not parser.unchanged
+    assert Font.open(ufo, validate=False) == _parse(sfd, options, tmp_path)
+
+    parser = convert(str(sfd), ufo, *options)
+    assert not parser.parsed
+    assert parser.unchanged == {"features", "kerning"}
+
+    # Outlines and font info don’t go into features or kerning.
+    _edit(sfd, r"^(SplineSet\n)(-?\d+)", r"\g<1>1\2")
+    _edit(sfd, r"^Copyright: .*$", "Copyright: Someone else")
+    parser = convert(str(sfd), ufo, *options)
+    assert parser.parsed == {".notdef"}
+    assert parser.unchanged == {"features", "kerning"}
+    assert Font.open(ufo, validate=False) == _parse(sfd, options, tmp_path)
+
+    _edit(sfd, r"-80 \{\}", "-81 {}")
+    parser = convert(str(sfd), ufo, *options)
+    assert not parser.parsed
+    assert not parser.unchanged
+    assert Font.open(ufo, validate=False) == _parse(sfd, options, tmp_path)
+
+    _edit(sfd, r"^Kerns2: 4 -50", "Kerns2: 4 -51")
+    parser = convert(str(sfd), ufo, *options)
+    assert "A" in parser.parsed
+    assert not parser.unchanged
+    assert Font.open(ufo, validate=False) == _parse(sfd, options, tmp_path)
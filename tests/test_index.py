@@ -0,0 +1,50 @@
+import re
+
+import pytest
+
+from sfdLib.index import SFDIndex
+
+
+def test_index(datadir):
+    path = datadir / "Test.sfd"
+    text = path.read_text()
+    names = re.findall(r"^StartChar: (.*)$", text, re.M)
+    orders = [int(o) for o in re.findall(r"^Encoding: \S+ \S+ (\S+)$", text, re.M)]
+
+    with SFDIndex(path) as index:
+        assert index.names == names
+        assert index.orders == orders
+        assert len(index) == len(names)
+        for idx, name in enumerate(names):
+            assert index.find(name) == idx
+            assert index.findGID(orders[idx]) == idx
+            lines = list(index.recordLines(idx))
+            assert lines[0] == f"StartChar: {name}\n"
+            assert lines[-1] == "EndChar\n"
+        assert index.recordValue(index.find("A"), "Width") == "600"
+        assert index.recordValue(index.find("A"), "Nothing") is None
+        anchors = list(index.recordValues(index.find("A"), "AnchorPoint"))
+        assert anchors == [
+            '"top" 300 700 basechar 0',
+            '"bottom" 300 0 basechar 0',
+            '"top6" 300 710 basechar 0',
+        ]
+        assert not list(index.recordValues(index.find("A"), "Nothing"))
+
+
+def test_index_no_blank_lines(tmp_path, datadir):
+    # Records directly after BeginChars and after the previous EndChar.
+    text = (datadir / "Test.sfd").read_text()
+    path = tmp_path / "Test.sfd"
+    path.write_text(re.sub(r"\n\n+StartChar:", "\nStartChar:", text))
+
+    with SFDIndex(datadir / "Test.sfd") as expected, SFDIndex(path) as index:
+        assert index.names == expected.names
+        assert index.orders == expected.orders
+
+
+def test_index_empty(tmp_path):
+    path = tmp_path / "Empty.sfd"
+    path.touch()
+    with pytest.raises(Exception, match="Not an SFD file."):
+        SFDIndex(path)
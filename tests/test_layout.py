@@ -0,0 +1,51 @@
+import re
+
+import pytest
+from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+from fontTools.ttLib import TTFont
+from ufoLib2 import Font
+
+from sfdLib.layout import LayoutSFDParser
+from sfdLib.parser import SFDParser
+
+
+def _layout(path):
+    font = Font()
+    parser = LayoutSFDParser(str(path), font)
+    parser.parse()
+    assert not font.features.text
+    ttFont = TTFont()
+    ttFont.setGlyphOrder(font.glyphOrder)
+    parser.buildTables(ttFont)
+    return font, ttFont
+
+
+def test_layout(tmp_path, generate, layoutTables):
+    path = tmp_path / "font.sfd"
+    path.write_text(generate(glyphs=500))
+    font, ttFont = _layout(path)
+
+    expected = Font()
+    SFDParser(str(path), expected).parse()
+    assert font.lib == expected.lib
+    expectedFont = TTFont()
+    expectedFont.setGlyphOrder(expected.glyphOrder)
+    addOpenTypeFeaturesFromString(expectedFont, expected.features.text)
+
+    tables = layoutTables(ttFont)
+    assert set(tables) == {"GSUB", "GPOS", "GDEF"}
+    assert tables == layoutTables(expectedFont)
+
+
+def test_layout_chain_forward_reference(datadir, nestedLookups):
+    _, ttFont = _layout(datadir / "ChainForward.sfd")
+    assert nestedLookups(ttFont["GSUB"].table) == [(5, [6]), (6, [1])]
+    assert nestedLookups(ttFont["GPOS"].table) == [(8, [1])]
+
+
+def test_layout_unknown_lookup(tmp_path, datadir):
+    text = (datadir / "ChainForward.sfd").read_text()
+    path = tmp_path / "ChainForward.sfd"
+    path.write_text(re.sub('SeqLookup: 0 "small caps"', 'SeqLookup: 0 "missing"', text))
+    with pytest.raises(Exception, match="unknown lookup: missing"):
+        _layout(path)
@@ -0,0 +1,63 @@
+import pytest
+from ufoLib2 import Font
+
+from sfdLib.lazy import LazySFDFont
+from sfdLib.parser import SFDParser
+
+OPTIONS = [(False, False, False), (True, True, False), (False, False, True)]
+
+
+def _parse(path, options):
+    font = Font()
+    SFDParser(str(path), font, *options).parse()
+    return font
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_lazy(datadir, options):
+    path = datadir / "Test.sfd"
+    expected = _parse(path, options)
+    with LazySFDFont(str(path), *options) as font:
+        assert not font.font.keys()
+        assert list(font.keys()) == expected.glyphOrder
+        assert font.glyphOrder == expected.glyphOrder
+        assert font.kerning == expected.kerning
+        assert font.groups == expected.groups
+        assert len(font) == len(expected)
+        assert "A" in font and "B" not in font
+        assert font.get("B") is None
+
+        assert font["Aacute"].components == expected["Aacute"].components
+        assert set(font.font.keys()) == {"Aacute"}
+
+        # UFO anchors are fixed up once every glyph is parsed, which a lazy
+        # font doesn’t do.
+        if options[0]:
+            return
+        for name in expected.keys():
+            assert font[name] == expected[name]
+        for layer in expected.layers:
+            for glyph in layer:
+                assert font.glyph(glyph.name, layer.name) == glyph
+
+
+@pytest.mark.parametrize("ufo_kerning", [False, True])
+def test_lazy_kerns(tmp_path, datadir, ufo_kerning):
+    # FontForge can write several Kerns2 lines for a glyph.
+    text = (datadir / "Test.sfd").read_text()
+    kerns = "Kerns2: 4 -50 \"'kern' pairs\" 5 -20 \"'kern' pairs\"\n"
+    assert kerns in text
+    path = tmp_path / "Test.sfd"
+    path.write_text(text.replace(kerns, kerns + "Kerns2: 10 -77 \"'kern' pairs\"\n"))
+
+    options = (False, ufo_kerning, False)
+    expected = Font()
+    parser = SFDParser(str(path), expected, *options)
+    parser.parse()
+    with LazySFDFont(str(path), *options) as font:
+        assert font._parser._kernPairs == parser._kernPairs
+        assert font.kerning == expected.kerning
+    if ufo_kerning:
+        assert expected.kerning["A", "i"] == -77
+    else:
+        assert "pos A i -77;" in expected.features.text
@@ -0,0 +1,60 @@
+import pytest
+from ufoLib2 import Font
+
+from sfdLib.parser import SFDParser
+
+OPTIONS = [(False, False, False), (True, True, False), (False, False, True)]
+
+
+def _parse(path, *args, **kwargs):
+    font = Font()
+    SFDParser(str(path), font, *args, **kwargs).parse()
+    return font
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_sfdir(datadir, sfdir, reopen, options):
+    font = reopen(_parse(sfdir, *options))
+    expected = reopen(_parse(datadir / "Test.sfd", *options))
+    # Glyph files are read in directory order, so kerning pairs are too.
+    lines = lambda font: sorted(font.features.text.splitlines())
+    assert lines(font) == lines(expected)
+    font.features = expected.features
+    assert font == expected
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_jobs(datadir, reopen, options):
+    path = datadir / "Test.sfd"
+    assert reopen(_parse(path, *options, 2)) == reopen(_parse(path, *options))
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_compact(datadir, reopen, options):
+    path = datadir / "Test.sfd"
+    font = _parse(path, *options, compact=True)
+    expected = _parse(path, *options)
+    assert font.keys() == expected.keys()
+    assert font["A"].contours == expected["A"].contours
+    assert reopen(font) == reopen(expected)
+
+
+def test_blank_lines(tmp_path, generate, reopen):
+    # FontForge separates glyphs with blank lines, hand edited files may not.
+    paths = []
+    for blankLines in (True, False):
+        path = tmp_path / f"font{blankLines}.sfd"
+        path.write_text(generate(glyphs=100, blankLines=blankLines))
+        paths.append(path)
+    assert paths[0].read_text() != paths[1].read_text()
+
+    fonts = [_parse(path) for path in paths]
+    assert len(fonts[1]) == 100
+    assert reopen(fonts[1]) == reopen(fonts[0])
+
+
+def test_empty(tmp_path):
+    path = tmp_path / "empty.sfd"
+    path.touch()
+    with pytest.raises(Exception, match="Not an SFD file."):
+        _parse(path)
@@ -0,0 +1,35 @@
+import sys
+
+import pytest
+from ufoLib2 import Font
+
+from sfdLib.__main__ import main
+from sfdLib.parser import SFDParser
+from sfdLib.profiler import PHASES, Profiler
+
+
+def test_phases(datadir):
+    profiler = Profiler()
+    font = Font()
+    SFDParser(datadir / "Test.sfd", font, profiler=profiler).parse()
+    with profiler.phase("save"):
+        pass
+    assert [p["name"] for p in profiler.phases] == list(PHASES)
+
+
+def test_cprofile(tmp_path, datadir, monkeypatch):
+    prof = tmp_path / "parse.prof"
+    args = [str(datadir / "Test.sfd"), str(tmp_path / "Test.ufo"), "--cprofile"]
+    monkeypatch.setattr(sys, "argv", ["sfd2ufo"] + args + ["parseChars", str(prof)])
+    main()
+    assert prof.exists()
+
+
+def test_cprofile_unknown_phase(tmp_path, datadir, monkeypatch, capsys):
+    prof = tmp_path / "parse.prof"
+    args = [str(datadir / "Test.sfd"), str(tmp_path / "Test.ufo"), "--cprofile"]
+    monkeypatch.setattr(sys, "argv", ["sfd2ufo"] + args + ["parsechars", str(prof)])
+    with pytest.raises(SystemExit):
+        main()
+    assert "unknown phase 'parsechars'" in capsys.readouterr().err
+    assert not prof.exists()
@@ -0,0 +1,35 @@
+import pytest
+from ufoLib2 import Font
+
+from sfdLib.parser import SFDParser
+from sfdLib.save import saveFont
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_save(tmp_path, datadir, ufoFiles, compact):
+    font = Font()
+    SFDParser(str(datadir / "Test.sfd"), font, compact=compact).parse()
+    font.save(tmp_path / "expected.ufo", validate=False)
+    saveFont(font, str(tmp_path / "Test.ufo"), 2)
+    assert ufoFiles(tmp_path / "Test.ufo") == ufoFiles(tmp_path / "expected.ufo")
+
+
+def test_save_generated(tmp_path, generate, ufoFiles):
+    # More glyphs than are serialized by one worker task.
+    path = tmp_path / "font.sfd"
+    path.write_text(generate(glyphs=600))
+    font = Font()
+    SFDParser(str(path), font).parse()
+    font.save(tmp_path / "expected.ufo", validate=False)
+    saveFont(font, str(tmp_path / "font.ufo"), 2)
+    assert ufoFiles(tmp_path / "font.ufo") == ufoFiles(tmp_path / "expected.ufo")
+
+
+def test_save_overwrite(tmp_path, datadir, ufoFiles):
+    font = Font()
+    SFDParser(str(datadir / "Test.sfd"), font).parse()
+    font.save(tmp_path / "expected.ufo", validate=False)
+    (tmp_path / "Test.ufo").mkdir()
+    (tmp_path / "Test.ufo" / "stale.txt").touch()
+    saveFont(font, str(tmp_path / "Test.ufo"), 2)
+    assert ufoFiles(tmp_path / "Test.ufo") == ufoFiles(tmp_path / "expected.ufo")
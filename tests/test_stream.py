@@ -0,0 +1,49 @@
+import pytest
+from ufoLib2 import Font
+
+from sfdLib.parser import SFDParser
+from sfdLib.stream import convert
+
+OPTIONS = [(False, False, False), (True, True, False), (False, False, True)]
+
+
+def _save(sfdfile, ufofile, options):
+    font = Font()
+    SFDParser(str(sfdfile), font, *options).parse()
+    font.save(ufofile, overwrite=True, validate=False)
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_stream(tmp_path, datadir, ufoFiles, options, jobs):
+    path = datadir / "Test.sfd"
+    _save(path, tmp_path / "expected.ufo", options)
+    convert(str(path), str(tmp_path / "Test.ufo"), *options, jobs)
+    assert ufoFiles(tmp_path / "Test.ufo") == ufoFiles(tmp_path / "expected.ufo")
+
+
+def test_stream_sfdir(tmp_path, sfdir, ufoFiles):
+    _save(sfdir, tmp_path / "expected.ufo", OPTIONS[0])
+    convert(str(sfdir), str(tmp_path / "Test.ufo"))
+    assert ufoFiles(tmp_path / "Test.ufo") == ufoFiles(tmp_path / "expected.ufo")
+
+
+def test_stream_generated(tmp_path, generate, ufoFiles):
+    path = tmp_path / "font.sfd"
+    path.write_text(generate(glyphs=500))
+    _save(path, tmp_path / "expected.ufo", OPTIONS[0])
+    convert(str(path), str(tmp_path / "font.ufo"))
+    assert ufoFiles(tmp_path / "font.ufo") == ufoFiles(tmp_path / "expected.ufo")
+
+
+def test_stream_replaces(tmp_path, datadir, ufoFiles):
+    # A failed conversion leaves the previous UFO alone.
+    ufo = tmp_path / "Test.ufo"
+    convert(str(datadir / "Test.sfd"), str(ufo))
+    before = ufoFiles(ufo)
+    empty = tmp_path / "empty.sfd"
+    empty.touch()
+    with pytest.raises(Exception, match="Not an SFD file."):
+        convert(str(empty), str(ufo))
+    assert ufoFiles(ufo) == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Test.ufo", "empty.sfd"]